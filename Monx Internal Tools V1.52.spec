@@ -28,8 +28,8 @@ a = Analysis(
         'docx',
         'docx.shared',
         'docx.enum.text',
-        'PyPDF2',
         'pdf2docx',
+        'fitz',
         'pptx',
         'pptx.util',
         'deepl',
@@ -1,12 +1,11 @@
 import streamlit as st
-import streamlit.components.v1 as components
-from utils import translate_text, init_page
+from utils import cached_translate_text, init_page, fragment
 
 init_page("文本翻译", "📝", "wide")
 
 
-# 页面专用样式 - 仅包含本页面特有的布局调整
-st.markdown("""
+# 页面专用样式 - 仅包含本页面特有的布局调整（模块级常量，重新运行时不再重复构造）
+_PAGE_CSS = """
 <style>
     /* 移除 Column Gap - 用于左右翻译框紧密连接 */
     [data-testid="column"] {
@@ -35,12 +34,29 @@ st.markdown("""
         border-radius: 0 12px 12px 0 !important;
     }
     
+    /* 右侧译文代码块: 与文本框等高、右圆角 */
+    [data-testid="stCode"] pre {
+        min-height: 500px !important;
+        border-radius: 0 12px 12px 0 !important;
+    }
+    
+    /* 中间列的视觉分割线 */
+    .translate-divider {
+        height: 450px;
+        border-right: 1px solid #e0e0e0;
+        width: 50%;
+        margin-top: 10px;
+    }
+    
     /* 隐藏 Labels */
     .stTextArea label, .stSelectbox label {
         display: none !important;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+st.markdown(_PAGE_CSS, unsafe_allow_html=True)
 
 # 弱化标题
 st.markdown("<h1>📝 文本翻译</h1>", unsafe_allow_html=True)
@@ -57,120 +73,74 @@ languages = [
 if "translated_text" not in st.session_state:
     st.session_state.translated_text = ""
 
-# 布局：三列 [10, 2, 10]
-col_left, col_mid, col_right = st.columns([10, 2, 10], gap="small") 
-
-with col_left:
-    input_text = st.text_area(
-        "Source Input",
-        height=500,
-        placeholder="输入文本...",
-        key="input_text",
-        label_visibility="collapsed"
-    )
 
-with col_mid:
-    # 语言选择器
-    target_language = st.selectbox(
-        "目标语言",
-        options=languages,
-        index=1,
-        key="target_language",
-        label_visibility="collapsed"
-    )
+# 翻译面板作为片段运行：输入、选择语言和点击翻译时只重新运行这一部分，
+# 页面样式和标题不随之重新执行
+@fragment
+def translation_panel():
+    """
+    渲染翻译面板（原文输入、目标语言、译文显示和翻译按钮）
+    """
+    # 布局：三列 [10, 2, 10]
+    col_left, col_mid, col_right = st.columns([10, 2, 10], gap="small") 
     
-    # 视觉分割线 (模拟两个文本框中间的线条)
-    # 使用绝对定位或高容器来绘制
-    st.markdown("""
-    <div style="
-        height: 450px; 
-        border-right: 1px solid #e0e0e0; 
-        width: 50%; 
-        margin-top: 10px;
-    "></div>
-    """, unsafe_allow_html=True)
-
-with col_right:
-    result_text = st.text_area(
-        "Translation Result",
-        value=st.session_state.translated_text,
-        height=500,
-        key="output_text",
-        label_visibility="collapsed",
-        disabled=True
-    )
+    with col_left:
+        input_text = st.text_area(
+            "Source Input",
+            height=500,
+            placeholder="输入文本...",
+            key="input_text",
+            label_visibility="collapsed"
+        )
     
-    # 复制按钮 (仅当有结果时显示) - 移至右侧列底部
-    if st.session_state.translated_text:
-        import json
-        escaped_text = json.dumps(st.session_state.translated_text)
-        
-        copy_button_html = f"""
-        <div style="margin-top: 10px;">
-            <button 
-                id="copyBtn" 
-                style="
-                    width: 100%;
-                    padding: 10px;
-                    background-color: white;
-                    color: #555;
-                    border: 1px solid #eee;
-                    border-radius: 8px;
-                    font-size: 14px;
-                    cursor: pointer;
-                "
-                onmouseover="this.style.backgroundColor='#f9f9f9'"
-                onmouseout="this.style.backgroundColor='white'"
-            >
-                📋 复制译文
-            </button>
-        </div>
+    with col_mid:
+        # 语言选择器
+        target_language = st.selectbox(
+            "目标语言",
+            options=languages,
+            index=1,
+            key="target_language",
+            label_visibility="collapsed"
+        )
         
-        <script>
-        (function() {{
-            const text = {escaped_text};
-            const copyBtn = document.getElementById('copyBtn');
-            
-            if (!copyBtn) {{
-                setTimeout(arguments.callee, 100);
-                return;
-            }}
-            
-            copyBtn.addEventListener('click', function() {{
-                if (navigator.clipboard) {{
-                    navigator.clipboard.writeText(text);
-                    copyBtn.innerText = '✅ 已复制';
-                    setTimeout(() => copyBtn.innerText = '📋 复制译文', 2000);
-                }} else {{
-                    const textarea = document.createElement('textarea');
-                    textarea.value = text;
-                    document.body.appendChild(textarea);
-                    textarea.select();
-                    document.execCommand('copy');
-                    document.body.removeChild(textarea);
-                    copyBtn.innerText = '✅ 已复制';
-                    setTimeout(() => copyBtn.innerText = '📋 复制译文', 2000);
-                }}
-            }});
-        }})();
-        </script>
-        """
-        components.html(copy_button_html, height=60)
-
-# 翻译按钮 (底部全宽)
-translate_button = st.button("翻译", type="primary", use_container_width=True)
-
-
-# 处理翻译逻辑
-if translate_button:
-    if not input_text.strip():
-        st.warning("⚠️ 请输入要翻译的文本！")
-    else:
-        with st.spinner("Translating..."):
-            try:
-                translated = translate_text(input_text, target_language)
-                st.session_state.translated_text = translated
-                st.rerun()
-            except Exception as e:
-                st.error(f"❌ 翻译失败: {str(e)}")
-
+        # 视觉分割线 (模拟两个文本框中间的线条)
+        # 使用绝对定位或高容器来绘制
+        # 样式定义在 _PAGE_CSS 中，这里只输出一个带类名的空元素
+        st.markdown('<div class="translate-divider"></div>', unsafe_allow_html=True)
+    
+    with col_right:
+        # 结果占位符：翻译完成后直接在此处原地更新，无需重新运行整个页面
+        result_placeholder = st.empty()
+        if st.session_state.translated_text:
+            # 有结果时使用 st.code 显示译文：自带复制图标，无需额外嵌入 iframe 复制按钮
+            result_placeholder.code(st.session_state.translated_text, language=None)
+        else:
+            # 空的占位文本框（只读，不需要 key：译文只保存在 session_state.translated_text 中）
+            result_placeholder.text_area(
+                "Translation Result",
+                value="",
+                height=500,
+                label_visibility="collapsed",
+                disabled=True
+            )
+    
+    # 翻译按钮 (底部全宽)
+    translate_button = st.button("翻译", type="primary", use_container_width=True)
+    
+    # 处理翻译逻辑
+    if translate_button:
+        # isspace() 遇到第一个非空白字符即返回，无需像 strip() 那样复制整段文本
+        if not input_text or input_text.isspace():
+            st.warning("⚠️ 请输入要翻译的文本！")
+        else:
+            with st.spinner("Translating..."):
+                try:
+                    translated = cached_translate_text(input_text, target_language)
+                    st.session_state.translated_text = translated
+                    if translated:
+                        result_placeholder.code(translated, language=None)
+                except Exception as e:
+                    st.error(f"❌ 翻译失败: {str(e)}")
+
+
+translation_panel()
@@ -1,8 +1,9 @@
 import streamlit as st
 from pathlib import Path
 import time
-import uuid
-from utils import handle_pdf_processing, translate_word_document, init_page
+import secrets
+import threading
+from utils import handle_pdf_processing, translate_word_document, init_page, save_stream_to_file, fragment, cleanup_temp_files
 
 init_page("文档翻译", "📄", "wide")
 
@@ -26,6 +27,10 @@ if "translated_path" not in st.session_state:
     st.session_state.translated_path = None
 if "original_filename" not in st.session_state:
     st.session_state.original_filename = None
+# 上传文件命名：每个会话生成一次随机前缀，之后使用递增序号
+if "_upload_seq" not in st.session_state:
+    st.session_state._upload_seq = 0
+    st.session_state._upload_salt = secrets.token_hex(4)
 
 
 def save_uploaded_file(uploaded_file, temp_dir: Path) -> str:
@@ -42,110 +47,59 @@ def save_uploaded_file(uploaded_file, temp_dir: Path) -> str:
     # 确保临时目录存在
     temp_dir.mkdir(exist_ok=True)
     
-    # 生成唯一文件名
-    unique_id = str(uuid.uuid4())
+    # 生成唯一文件名（会话前缀 + 递增序号，会话内不会重复）
+    unique_id = f"{st.session_state._upload_salt}_{st.session_state._upload_seq}"
+    st.session_state._upload_seq += 1
     file_extension = Path(uploaded_file.name).suffix
     file_path = temp_dir / f"uploaded_{unique_id}{file_extension}"
     
-    # 保存文件
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+    # 保存文件（分块写入，避免将整个文件读入内存）
+    uploaded_file.seek(0)  # 上传对象在多次重新运行之间可能被复用，从头开始写入
+    save_stream_to_file(uploaded_file, file_path)
     
     return str(file_path)
 
 
-def cleanup_temp_files(temp_dir: Path, keep_files: list = None):
+def new_translated_path(temp_dir: Path, target_language: str) -> str:
     """
-    清理临时文件夹中的文件
+    为本次翻译生成独立的输出文件路径
+    
+    PDF 转换结果按内容摘要命名，会被所有会话共用，因此译文不能使用默认的
+    translated_<原文件名>.docx，否则不同会话、不同目标语言的结果会互相覆盖
     
     参数:
         temp_dir: 临时目录路径
-        keep_files: 需要保留的文件列表（完整路径）
-    """
-    if not temp_dir.exists():
-        return
-    
-    keep_files = keep_files or []
-    keep_paths = [Path(f) for f in keep_files]
+        target_language: 目标语言
     
-    # 清理超过1小时的文件
-    current_time = time.time()
-    for file_path in temp_dir.iterdir():
-        if file_path.is_file():
-            # 如果文件在保留列表中，跳过
-            if file_path in keep_paths:
-                continue
-            
-            # 如果文件超过1小时，删除
-            try:
-                file_age = current_time - file_path.stat().st_mtime
-                if file_age > 3600:  # 1小时 = 3600秒
-                    file_path.unlink()
-            except Exception as e:
-                # 如果删除失败，忽略（可能文件正在使用）
-                pass
+    返回:
+        str: 输出文件路径（会话前缀 + 递增序号 + 目标语言，会话内不会重复）
+    """
+    unique_id = f"{st.session_state._upload_salt}_{st.session_state._upload_seq}"
+    st.session_state._upload_seq += 1
+    return str(temp_dir / f"translated_{unique_id}_{target_language}.docx")
 
 
-# 侧边栏提示信息
-st.sidebar.header("💡 使用提示")
-st.sidebar.info("**支持格式：**\n\n- PDF 文档（自动转换为 Word）\n- Word 文档 (.docx)\n\n**注意事项：**\n\n- 扫描版 PDF 暂不支持\n- 翻译可能需要一些时间\n- 临时文件会自动清理")
+def get_session_files() -> list:
+    """
+    获取当前会话正在使用的临时文件（清理时需要保留）
+    
+    返回:
+        list: 文件路径列表
+    """
+    return [p for p in (st.session_state.docx_path, st.session_state.translated_path) if p]
 
-# 主界面
-col1, col2 = st.columns([1, 1])
 
-with col1:
-    st.subheader("📤 上传文档")
-    
-    # 文件上传组件
-    uploaded_file = st.file_uploader(
-        "选择要翻译的文档",
-        type=['docx', 'pdf'],
-        help="支持 PDF 和 Word (.docx) 格式"
-    )
+@fragment
+def render_translation_panel(target_language: str):
+    """
+    渲染翻译结果区域（翻译按钮、进度显示和下载按钮）
     
-    # 处理上传的文件
-    if uploaded_file is not None:
-        st.info(f"📎 已选择文件：**{uploaded_file.name}**")
-        
-        # 创建临时目录
-        temp_dir = Path("temp")
-        temp_dir.mkdir(exist_ok=True)
-        
-        # 根据文件类型处理
-        file_extension = Path(uploaded_file.name).suffix.lower()
-        
-        if file_extension == '.pdf':
-            # 情况A：处理PDF文件
-            st.info("🔄 正在处理 PDF 文件...")
-            
-            with st.spinner("检查PDF文件并转换为Word格式..."):
-                docx_path, error_msg = handle_pdf_processing(uploaded_file)
-                
-                if error_msg:
-                    st.error(f"❌ **处理失败：** {error_msg}")
-                    st.session_state.docx_path = None
-                else:
-                    st.success("✅ PDF 已成功转换为 Word 格式！")
-                    st.session_state.docx_path = docx_path
-                    st.session_state.original_filename = uploaded_file.name
-        
-        elif file_extension == '.docx':
-            # 情况B：处理Word文件
-            st.info("📄 正在保存 Word 文件...")
-            
-            with st.spinner("保存文件到临时目录..."):
-                try:
-                    docx_path = save_uploaded_file(uploaded_file, temp_dir)
-                    st.success("✅ Word 文件已准备就绪！")
-                    st.session_state.docx_path = docx_path
-                    st.session_state.original_filename = uploaded_file.name
-                except Exception as e:
-                    st.error(f"❌ **保存失败：** {str(e)}")
-                    st.session_state.docx_path = None
-
-with col2:
-    st.subheader("🌐 翻译结果")
+    作为片段运行：点击翻译或下载时只重新运行这一区域，
+    不会重复执行上传文件处理和页面底部的自动清理
     
+    参数:
+        target_language: 目标语言
+    """
     # 检查是否有可用的Word文件路径
     if st.session_state.docx_path and Path(st.session_state.docx_path).exists():
         st.success("✅ 文档已准备就绪，可以开始翻译")
@@ -182,7 +136,8 @@ with col2:
                 translated_path = translate_word_document(
                     st.session_state.docx_path,
                     target_language,
-                    progress_callback=update_progress
+                    progress_callback=update_progress,
+                    output_path=new_translated_path(Path("temp"), target_language)
                 )
                 
                 # 完成时更新进度条和状态
@@ -217,25 +172,22 @@ with col2:
             st.markdown("---")
             st.success("🎉 **翻译成功！** 您可以下载翻译后的文档了。")
             
-            # 读取翻译后的文件内容
-            with open(st.session_state.translated_path, "rb") as f:
-                file_content = f.read()
-            
             # 生成下载文件名
             original_name = Path(st.session_state.original_filename).stem if st.session_state.original_filename else "document"
             # 确保文件名是字符串
             download_filename = f"translated_{original_name}_{target_language}.docx"
             
-            # 下载按钮
-            st.download_button(
-                label="📥 下载翻译后的文档",
-                data=file_content,
-                file_name=download_filename,
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                use_container_width=True,
-                type="primary",
-                key="download_btn"
-            )
+            # 下载按钮（直接传入文件对象，不在页面脚本中保留一份文件内容）
+            with open(st.session_state.translated_path, "rb") as f:
+                st.download_button(
+                    label="📥 下载翻译后的文档",
+                    data=f,
+                    file_name=download_filename,
+                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                    use_container_width=True,
+                    type="primary",
+                    key="download_btn"
+                )
             
             # 清理提示
             st.caption("💡 下载完成后，临时文件将在1小时后自动清理")
@@ -243,27 +195,78 @@ with col2:
     else:
         st.info("👆 请先上传文档")
 
+
+# 侧边栏提示信息
+st.sidebar.header("💡 使用提示")
+st.sidebar.info("**支持格式：**\n\n- PDF 文档（自动转换为 Word）\n- Word 文档 (.docx)\n\n**注意事项：**\n\n- 扫描版 PDF 暂不支持\n- 翻译可能需要一些时间\n- 临时文件会自动清理")
+
+# 主界面
+col1, col2 = st.columns([1, 1])
+
+with col1:
+    st.subheader("📤 上传文档")
+    
+    # 文件上传组件
+    uploaded_file = st.file_uploader(
+        "选择要翻译的文档",
+        type=['docx', 'pdf'],
+        help="支持 PDF 和 Word (.docx) 格式"
+    )
+    
+    # 处理上传的文件
+    if uploaded_file is not None:
+        st.info(f"📎 已选择文件：**{uploaded_file.name}**")
+        
+        # 创建临时目录
+        temp_dir = Path("temp")
+        temp_dir.mkdir(exist_ok=True)
+        
+        # 根据文件类型处理
+        file_extension = Path(uploaded_file.name).suffix.lower()
+        
+        if file_extension == '.pdf':
+            # 情况A：处理PDF文件
+            st.info("🔄 正在处理 PDF 文件...")
+            
+            with st.spinner("检查PDF文件并转换为Word格式..."):
+                docx_path, error_msg = handle_pdf_processing(uploaded_file)
+                
+                if error_msg:
+                    st.error(f"❌ **处理失败：** {error_msg}")
+                    st.session_state.docx_path = None
+                else:
+                    st.success("✅ PDF 已成功转换为 Word 格式！")
+                    st.session_state.docx_path = docx_path
+                    st.session_state.original_filename = uploaded_file.name
+        
+        elif file_extension == '.docx':
+            # 情况B：处理Word文件
+            st.info("📄 正在保存 Word 文件...")
+            
+            with st.spinner("保存文件到临时目录..."):
+                try:
+                    docx_path = save_uploaded_file(uploaded_file, temp_dir)
+                    st.success("✅ Word 文件已准备就绪！")
+                    st.session_state.docx_path = docx_path
+                    st.session_state.original_filename = uploaded_file.name
+                except Exception as e:
+                    st.error(f"❌ **保存失败：** {str(e)}")
+                    st.session_state.docx_path = None
+
+with col2:
+    st.subheader("🌐 翻译结果")
+    render_translation_panel(target_language)
+
 # 页面底部：清理临时文件
 st.markdown("---")
 with st.expander("🗑️ 清理临时文件"):
     if st.button("清理所有临时文件（保留当前会话文件）"):
-        temp_dir = Path("temp")
-        keep_files = []
-        if st.session_state.docx_path:
-            keep_files.append(st.session_state.docx_path)
-        if st.session_state.translated_path:
-            keep_files.append(st.session_state.translated_path)
-        
-        cleanup_temp_files(temp_dir, keep_files)
+        cleanup_temp_files(Path("temp"), get_session_files())
         st.success("✅ 临时文件清理完成！")
 
-# 自动清理：每次页面加载时清理旧文件
+# 自动清理：每个会话首次加载时在后台线程中清理旧文件，不阻塞页面渲染
 temp_dir = Path("temp")
-if temp_dir.exists():
-    keep_files = []
-    if st.session_state.docx_path:
-        keep_files.append(st.session_state.docx_path)
-    if st.session_state.translated_path:
-        keep_files.append(st.session_state.translated_path)
-    cleanup_temp_files(temp_dir, keep_files)
+if temp_dir.exists() and not st.session_state.get("_cleaner_started"):
+    st.session_state._cleaner_started = True
+    threading.Thread(target=cleanup_temp_files, args=(temp_dir, get_session_files()), daemon=True).start()
 
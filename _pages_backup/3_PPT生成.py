@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import init_page, parse_ppt_content, generate_pptx
+from utils import init_page, build_pptx_from_content
 from pathlib import Path
 
 init_page("PPT 生成", "📊", "wide")
@@ -47,8 +47,8 @@ if st.button("🚀 生成 PPT", type="primary", use_container_width=True):
     else:
         with st.spinner("正在生成 PPT..."):
             try:
-                # 解析内容
-                slides = parse_ppt_content(ppt_content)
+                # 解析内容并生成 PPTX（相同内容的结果会被缓存）
+                slides, pptx_bytes = build_pptx_from_content(ppt_content)
                 
                 if not slides:
                     st.error("❌ 无法解析内容，请检查格式")
@@ -57,25 +57,23 @@ if st.button("🚀 生成 PPT", type="primary", use_container_width=True):
                     
                     # 预览
                     with st.expander("📋 内容预览", expanded=True):
+                        # 拼接为一整段 Markdown 一次输出，避免每页每条要点都生成一个元素
+                        parts = []
                         for i, slide in enumerate(slides, 1):
-                            st.markdown(f"**第 {i} 页: {slide.get('title', '无标题')}**")
-                            for item in slide.get('content', []):
-                                st.markdown(f"  - {item}")
-                            st.markdown("---")
-                    
-                    # 生成 PPTX
-                    output_path = generate_pptx(slides)
+                            parts.append(f"**第 {i} 页: {slide.get('title', '无标题')}**")
+                            parts.extend(f"  - {item}" for item in slide.get('content', []))
+                            parts.append("---")
+                        st.markdown("\n\n".join(parts))
                     
                     # 提供下载
-                    with open(output_path, "rb") as f:
-                        st.download_button(
-                            label="📥 下载 PPT 文件",
-                            data=f.read(),
-                            file_name="generated_presentation.pptx",
-                            mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                            type="primary",
-                            use_container_width=True
-                        )
+                    st.download_button(
+                        label="📥 下载 PPT 文件",
+                        data=pptx_bytes,
+                        file_name="generated_presentation.pptx",
+                        mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+                        type="primary",
+                        use_container_width=True
+                    )
                     
                     st.success("✅ PPT 生成成功！")
                     
@@ -6,14 +6,49 @@ AI 服务模块
 本模块作为未来扩展的备选封装层保留
 """
 
+import re
+import time
+import random
 import openai
 from typing import Optional, List, Dict, Any
 from config import DEEPSEEK_API_KEY, DEEPSEEK_API_BASE, DEEPSEEK_MODEL, DEFAULT_TEMPERATURE, DEFAULT_MAX_TOKENS
 
+# 中日韩文字（汉字、假名、谚文）：这类文字每个字符约占 1 个或更多 token
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+
 
 class AIService:
     """AI 服务类，封装 DeepSeek API 调用"""
     
+    # 提示词模板（类级别常量，调用时使用 format_map 填充）
+    _SUMMARIZE_TMPL = """请总结以下文本内容，总结长度控制在 {max_length} 字以内：
+
+{text}
+
+总结："""
+    
+    _TRANSLATE_TMPL = """请将以下文本翻译成{lang}，保持原意和格式：
+
+{text}
+
+翻译结果："""
+    
+    _IMPROVE_TMPL = """请根据以下要求改进文本：
+
+要求：{instruction}
+
+原文：
+{text}
+
+改进后的文本："""
+    
+    _GENERATE_TMPL = """请根据以下主题生成一篇{content_type}：
+
+主题：{topic}
+长度：约 {length} 字
+
+请开始生成："""
+    
     def __init__(self, api_key: Optional[str] = None):
         """
         初始化 AI 服务
@@ -26,25 +61,86 @@ class AIService:
             raise ValueError("未设置 DeepSeek API 密钥，请在环境变量或配置文件中设置 DEEPSEEK_API_KEY")
         
         # 初始化 OpenAI 客户端（DeepSeek 兼容 OpenAI SDK）
+        # 重试由 chat_completion 自行处理，因此关闭 SDK 内置重试
         self.client = openai.OpenAI(
             api_key=self.api_key,
-            base_url=DEEPSEEK_API_BASE
+            base_url=DEEPSEEK_API_BASE,
+            max_retries=0
         )
         self.model = DEEPSEEK_MODEL
     
+    # 翻译是确定性任务，使用 0 温度（输出更稳定，也更利于服务端的前缀缓存命中）
+    _TRANSLATE_TEMPERATURE = 0.0
+    
+    # 译文被截断时逐步放宽输出上限，最多放宽到模型允许的最大输出 token 数
+    _TRANSLATE_MAX_TOKENS_LIMIT = 8192
+    
+    @classmethod
+    def _translation_max_tokens(cls, text: str) -> int:
+        """
+        按原文长度和文字类型估算译文的输出 token 上限
+        
+        含中日韩文字时按每个字符 2 个 token 预留（中文译为德语、意大利语等语言时，
+        译文 token 数通常明显多于原文字符数）；其他文字按每 2 个字符 1 个 token 估算后再翻倍
+        
+        Args:
+            text: 要翻译的文本
+        
+        Returns:
+            输出 token 上限（不超过 _TRANSLATE_MAX_TOKENS_LIMIT）
+        """
+        if _CJK_RE.search(text):
+            budget = len(text) * 2
+        else:
+            budget = max(32, len(text) // 2) * 2
+        return min(cls._TRANSLATE_MAX_TOKENS_LIMIT, budget + 64)
+    
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int, base_delay: float = 1.0, max_delay: float = 30.0) -> float:
+        """
+        计算第 attempt 次失败后的等待秒数
+        
+        速率限制响应带有 Retry-After 头时按其等待（不超过 60 秒），
+        否则使用指数退避 + 完全随机抖动，避免多个请求同时重试
+        
+        Args:
+            error: 捕获到的异常
+            attempt: 已失败的次数（从0开始）
+            base_delay: 基础等待秒数
+            max_delay: 退避等待的上限秒数
+        
+        Returns:
+            等待秒数
+        """
+        if isinstance(error, openai.RateLimitError):
+            try:
+                return min(max(float(error.response.headers["retry-after"]), 0.0), 60.0)
+            except (AttributeError, KeyError, TypeError, ValueError):
+                pass
+        return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+    
+    @staticmethod
+    def _user_message(content: str) -> List[Dict[str, str]]:
+        """
+        构造只包含一条用户消息的消息列表
+        """
+        return [{"role": "user", "content": content}]
+    
     def chat_completion(
         self,
         messages: List[Dict[str, str]],
         temperature: float = DEFAULT_TEMPERATURE,
-        max_tokens: int = DEFAULT_MAX_TOKENS
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        max_retries: int = 3
     ) -> str:
         """
-        发送聊天请求到 DeepSeek API
+        发送聊天请求到 DeepSeek API（速率限制、超时和连接错误时按 Retry-After 或带随机抖动的指数退避重试）
         
         Args:
             messages: 消息列表，格式为 [{"role": "user", "content": "..."}]
             temperature: 温度参数，控制输出的随机性（0-1）
             max_tokens: 最大生成 token 数
+            max_retries: 最大尝试次数（小于 1 时按 1 处理，至少请求一次）
         
         Returns:
             AI 返回的文本内容
@@ -52,16 +148,35 @@ class AIService:
         Raises:
             Exception: API 调用失败时抛出异常
         """
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            raise Exception(f"AI API 调用失败: {str(e)}")
+        return self._create_completion(messages, temperature, max_tokens, max_retries).message.content
+    
+    def _create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        max_retries: int = 3
+    ) -> Any:
+        """
+        发送聊天请求并返回第一个候选结果（包含 message 和 finish_reason），重试规则同 chat_completion
+        """
+        max_retries = max(1, max_retries)
+        
+        for attempt in range(max_retries):
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+                return response.choices[0]
+            except (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError) as e:
+                if attempt == max_retries - 1:
+                    raise Exception(f"AI API 调用失败（已重试{max_retries}次）: {str(e)}")
+                time.sleep(self._retry_delay(e, attempt))
+            except Exception as e:
+                raise Exception(f"AI API 调用失败: {str(e)}")
     
     def summarize_text(self, text: str, max_length: int = 500) -> str:
         """
@@ -74,17 +189,9 @@ class AIService:
         Returns:
             总结后的文本
         """
-        prompt = f"""请总结以下文本内容，总结长度控制在 {max_length} 字以内：
-
-{text}
-
-总结："""
-        
-        messages = [
-            {"role": "user", "content": prompt}
-        ]
+        prompt = self._SUMMARIZE_TMPL.format_map({"max_length": max_length, "text": text})
         
-        return self.chat_completion(messages, temperature=0.5)
+        return self.chat_completion(self._user_message(prompt), temperature=0.5)
     
     def translate_text(self, text: str, target_language: str = "英文") -> str:
         """
@@ -96,18 +203,23 @@ class AIService:
         
         Returns:
             翻译后的文本
-        """
-        prompt = f"""请将以下文本翻译成{target_language}，保持原意和格式：
-
-{text}
-
-翻译结果："""
         
-        messages = [
-            {"role": "user", "content": prompt}
-        ]
+        Raises:
+            Exception: API 调用失败，或放宽到最大输出上限后译文仍被截断时抛出异常
+        """
+        prompt = self._TRANSLATE_TMPL.format_map({"lang": target_language, "text": text})
+        messages = self._user_message(prompt)
+        # 按原文长度和文字类型设置输出上限，短段落不必按全局上限预留
+        max_tokens = self._translation_max_tokens(text)
         
-        return self.chat_completion(messages, temperature=0.3)
+        while True:
+            choice = self._create_completion(messages, self._TRANSLATE_TEMPERATURE, max_tokens)
+            if choice.finish_reason != "length":
+                return choice.message.content
+            # 输出达到上限被截断：放宽上限后重新翻译，不返回不完整的译文
+            if max_tokens >= self._TRANSLATE_MAX_TOKENS_LIMIT:
+                raise Exception(f"AI API 调用失败: 译文超过 {max_tokens} token 被截断")
+            max_tokens = min(max_tokens * 2, self._TRANSLATE_MAX_TOKENS_LIMIT)
     
     def improve_text(self, text: str, instruction: str = "优化表达，使其更加专业和流畅") -> str:
         """
@@ -120,20 +232,9 @@ class AIService:
         Returns:
             改进后的文本
         """
-        prompt = f"""请根据以下要求改进文本：
-
-要求：{instruction}
-
-原文：
-{text}
-
-改进后的文本："""
-        
-        messages = [
-            {"role": "user", "content": prompt}
-        ]
+        prompt = self._IMPROVE_TMPL.format_map({"instruction": instruction, "text": text})
         
-        return self.chat_completion(messages, temperature=0.7)
+        return self.chat_completion(self._user_message(prompt), temperature=0.7)
     
     def generate_content(self, topic: str, content_type: str = "文章", length: str = "中等") -> str:
         """
@@ -150,17 +251,11 @@ class AIService:
         length_map = {"短": 200, "中等": 500, "长": 1000}
         target_length = length_map.get(length, 500)
         
-        prompt = f"""请根据以下主题生成一篇{content_type}：
-
-主题：{topic}
-长度：约 {target_length} 字
-
-请开始生成："""
+        prompt = self._GENERATE_TMPL.format_map({
+            "content_type": content_type,
+            "topic": topic,
+            "length": target_length
+        })
         
-        messages = [
-            {"role": "user", "content": prompt}
-        ]
-        
-        return self.chat_completion(messages, max_tokens=target_length * 2)
-
+        return self.chat_completion(self._user_message(prompt), max_tokens=target_length * 2)
 
@@ -13,19 +13,32 @@ DEEPSEEK_API_BASE: str = "https://api.deepseek.com/v1"
 DEEPSEEK_MODEL: str = "deepseek-chat"  # 默认模型
 
 # DeepL API 配置
-# 从环境变量或 Streamlit secrets 中读取 API 密钥
-DEEPL_API_KEY: Optional[str] = None
-try:
-    # 尝试从 Streamlit secrets 获取
-    import streamlit as st
-    if hasattr(st, 'secrets') and hasattr(st.secrets, 'get'):
-        DEEPL_API_KEY = st.secrets.get("DEEPL_API_KEY")
-except:
-    pass
-
-# 如果 secrets 中没有，尝试从环境变量获取
-if not DEEPL_API_KEY:
-    DEEPL_API_KEY = os.getenv("DEEPL_API_KEY")
+# 从环境变量或 Streamlit secrets 中读取 API 密钥（延迟读取：只有真正需要时才导入 Streamlit）
+_deepl_api_key: Optional[str] = None
+
+def get_deepl_key() -> Optional[str]:
+    """
+    获取 DeepL API 密钥（优先使用环境变量，其次使用 Streamlit secrets）
+    
+    读取到的密钥会被缓存；未读取到时不缓存，配置补上后无需重启即可生效
+    
+    Returns:
+        API 密钥，未配置时返回 None
+    """
+    global _deepl_api_key
+    
+    if not _deepl_api_key:
+        key = os.getenv("DEEPL_API_KEY")
+        if not key:
+            try:
+                import streamlit as st
+                key = st.secrets.get("DEEPL_API_KEY")
+            except Exception:
+                key = None
+        _deepl_api_key = key
+    
+    return _deepl_api_key
+
 
 # 应用配置
 APP_TITLE: str = "AI Office Assistant"
@@ -39,3 +52,4 @@ ALLOWED_PPT_EXTENSIONS: list = [".pptx", ".ppt"]
 # AI 请求配置
 DEFAULT_TEMPERATURE: float = 0.7
 DEFAULT_MAX_TOKENS: int = 2000
+DEEPL_MAX_WORKERS: int = 8  # 文档翻译时并发请求 DeepL 批量翻译接口的最大线程数
@@ -28,10 +28,13 @@ if __name__ == "__main__":
             "--global.developmentMode=false",
         ]
         stcli.main()
+    except SystemExit:
+        # 正常退出（如 Ctrl+C 关闭服务），直接结束，无需等待按键
+        raise
     except Exception as e:
         # 打印详细错误堆栈
         traceback.print_exc()
-    finally:
-        # 无论正常结束还是报错结束，都暂停等待用户按键
-        input("程序已结束或出错，按回车键退出...")
+        # 出错时暂停等待用户按键，方便查看错误信息（无控制台时跳过，避免阻塞）
+        if sys.stdin and sys.stdin.isatty():
+            input("程序出错，按回车键退出...")
 
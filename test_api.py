@@ -4,14 +4,32 @@
 """
 import os
 import sys
+import tomllib
+from functools import lru_cache
+from pathlib import Path
 
 # 设置 Windows 控制台编码为 UTF-8
 if sys.platform == 'win32':
-    try:
-        sys.stdout.reconfigure(encoding='utf-8')
-        sys.stderr.reconfigure(encoding='utf-8')
-    except:
-        pass
+    for _stream in (sys.stdout, sys.stderr):
+        # 已经是 UTF-8（如 Python 3.15+ 默认）时无需重新配置
+        if _stream is None or (_stream.encoding or '').lower().replace('-', '') == 'utf8':
+            continue
+        try:
+            _stream.reconfigure(encoding='utf-8')
+        except Exception:
+            pass
+
+
+@lru_cache(maxsize=None)
+def load_secrets():
+    """读取并解析 .streamlit/secrets.toml（只读取一次），文件不存在时返回 None"""
+    secrets_path = Path(".streamlit/secrets.toml")
+    if not secrets_path.exists():
+        return None
+    
+    # 使用标准库 tomllib 解析（项目要求 Python 3.11+）
+    return tomllib.loads(secrets_path.read_text(encoding='utf-8'))
+
 
 def test_api_key_config(api_name="DEEPSEEK"):
     """测试 API Key 配置"""
@@ -32,27 +50,19 @@ def test_api_key_config(api_name="DEEPSEEK"):
     
     # 检查 Streamlit secrets
     try:
-        from pathlib import Path
-        import re
-        
-        secrets_path = Path(".streamlit/secrets.toml")
-        if secrets_path.exists():
+        secrets = load_secrets()
+        if secrets is not None:
             print("✓ 找到 .streamlit/secrets.toml 文件")
-            # 简单读取 TOML 文件（不使用外部库）
-            with open(secrets_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # 使用正则表达式提取 API Key
-                match = re.search(rf'{env_var_name}\s*=\s*["\']([^"\']+)["\']', content)
-                if match:
-                    secrets_key = match.group(1)
-                    if secrets_key and secrets_key not in ["your-api-key-here", "your-deepl-api-key-here"]:
-                        print(f"✓ 从 secrets.toml 找到 {api_name} API Key")
-                        print(f"  Key 前缀: {secrets_key[:10]}...")
-                        return secrets_key
-                    else:
-                        print(f"✗ secrets.toml 中的 {api_name} API Key 未配置或仍为默认值")
+            secrets_key = secrets.get(env_var_name)
+            if isinstance(secrets_key, str):
+                if secrets_key and secrets_key not in ["your-api-key-here", "your-deepl-api-key-here"]:
+                    print(f"✓ 从 secrets.toml 找到 {api_name} API Key")
+                    print(f"  Key 前缀: {secrets_key[:10]}...")
+                    return secrets_key
                 else:
-                    print(f"✗ 无法从 secrets.toml 中解析 {env_var_name}")
+                    print(f"✗ secrets.toml 中的 {api_name} API Key 未配置或仍为默认值")
+            else:
+                print(f"✗ 无法从 secrets.toml 中解析 {env_var_name}")
         else:
             print("✗ 未找到 .streamlit/secrets.toml 文件")
     except Exception as e:
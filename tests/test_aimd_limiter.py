@@ -0,0 +1,46 @@
+"""
+测试 utils._call_deepl_limited 的自适应并发限制（AIMD）
+运行方式：python -m unittest discover tests
+"""
+import unittest
+from unittest import mock
+
+import deepl
+
+import utils
+
+
+class AimdLimiterTest(unittest.TestCase):
+    """一连串 429 之后并发限制应减半收缩，请求恢复成功后再逐步回升"""
+    
+    def setUp(self):
+        self.limiter = utils._AimdLimiter(initial=8, maximum=8)
+        patcher = mock.patch.object(utils, "_deepl_limiter", self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def call_throttled(self):
+        def raise_429():
+            raise deepl.exceptions.TooManyRequestsException("Too many requests")
+        with self.assertRaises(deepl.exceptions.TooManyRequestsException):
+            utils._call_deepl_limited(raise_429)
+    
+    def test_limit_shrinks_on_429_and_recovers(self):
+        for expected in (4, 2, 1, 1):
+            self.call_throttled()
+            self.assertEqual(self.limiter._limit, expected)
+        
+        previous = self.limiter._limit
+        for _ in range(10):
+            self.assertEqual(utils._call_deepl_limited(lambda: "ok"), "ok")
+            self.assertGreater(self.limiter._limit, previous)
+            previous = self.limiter._limit
+        
+        for _ in range(100):
+            utils._call_deepl_limited(lambda: "ok")
+        self.assertEqual(self.limiter._limit, 8)
+        self.assertEqual(self.limiter._in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
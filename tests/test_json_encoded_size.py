@@ -0,0 +1,31 @@
+"""
+测试 utils._json_encoded_size 对 DeepL 请求体大小的估算
+运行方式：python -m unittest discover tests
+"""
+import json
+import unittest
+
+from utils import _json_encoded_size
+
+
+class JsonEncodedSizeTest(unittest.TestCase):
+    """批次大小必须按请求体中 JSON 转义后的字节数计算，而不是 UTF-8 字节数"""
+    
+    def test_ascii_text(self):
+        self.assertEqual(_json_encoded_size("hello"), len('"hello"'))
+    
+    def test_cjk_text_is_measured_escaped(self):
+        text = "汉" * 1000
+        self.assertEqual(len(text.encode("utf-8")), 3000)
+        self.assertEqual(_json_encoded_size(text), 6002)
+        self.assertEqual(_json_encoded_size(text), len(json.dumps(text).encode("utf-8")))
+    
+    def test_cjk_batch_over_the_wire_limit(self):
+        # UTF-8 只有 60 KB，但转义后约 120 KB，超过了文档翻译的每批 120 KiB 上限
+        text = "汉" * 20_500
+        self.assertLess(len(text.encode("utf-8")), 120 * 1024)
+        self.assertGreater(_json_encoded_size(text), 120 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
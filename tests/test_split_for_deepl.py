@@ -0,0 +1,40 @@
+"""
+测试 utils._split_for_deepl 的长文本拆分
+运行方式：python -m unittest discover tests
+"""
+import unittest
+
+from utils import _split_for_deepl
+
+
+class SplitForDeeplTest(unittest.TestCase):
+    """_split_for_deepl 拆分结果的字节上限和完整性"""
+    
+    def assert_valid_chunks(self, text, chunks, max_bytes):
+        self.assertEqual("".join(chunks), text)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk.encode("utf-8")), max_bytes)
+    
+    def test_short_text_is_not_split(self):
+        self.assertEqual(_split_for_deepl("你好。", max_bytes=100), ["你好。"])
+    
+    def test_splits_on_sentences(self):
+        text = "第一句。第二句。第三句。" * 10
+        chunks = _split_for_deepl(text, max_bytes=64)
+        self.assertGreater(len(chunks), 1)
+        self.assert_valid_chunks(text, chunks, 64)
+    
+    def test_overlong_unbroken_ascii_string(self):
+        text = "a" * 1000
+        chunks = _split_for_deepl(text, max_bytes=64)
+        self.assert_valid_chunks(text, chunks, 64)
+    
+    def test_overlong_unbroken_multibyte_string(self):
+        # 每个汉字占 3 字节，64 不是 3 的倍数，切分点必须回退到字符边界
+        text = "汉" * 1000 + "😀" * 100
+        chunks = _split_for_deepl(text, max_bytes=64)
+        self.assert_valid_chunks(text, chunks, 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,60 +1,97 @@
 import os
+import io
 import json
+import logging
+import hashlib
+import httpx
 import streamlit as st
 from openai import OpenAI
-from typing import Tuple, Optional, List, Dict, Any
-import PyPDF2
-from pdf2docx import Converter
-from docx import Document
+from typing import Tuple, Optional, List, Dict, Any, Union, IO
 import uuid
 from pathlib import Path
 import time
+import random
 import re
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
+from threading import Condition, Lock
 import deepl
+from config import DEEPL_MAX_WORKERS, get_deepl_key
+
+# 模块日志（重试等提示在线程池的工作线程中产生，统一交给 logging 处理，而不是直接打印）
+logger = logging.getLogger(__name__)
 
 # 全局 DeepL 翻译器实例（只初始化一次）
 deepl_translator = None
+# 保护单例初始化：线程池中的多个线程首次同时调用时，只创建一个实例
+_deepl_translator_lock = Lock()
 
 def _get_deepl_translator():
     """
-    获取全局 DeepL 翻译器实例（单例模式）
+    获取全局 DeepL 翻译器实例（单例模式，线程安全）
     """
     global deepl_translator
     
-    if deepl_translator is None:
-        # 显式初始化变量，防止报错
-        api_key = None
-        
-        # 尝试从 Streamlit secrets 获取
-        try:
-            if hasattr(st, 'secrets') and hasattr(st.secrets, 'get'):
-                api_key = st.secrets.get("DEEPL_API_KEY")
-        except Exception:
-            pass
-        
-        # 如果 secrets 中没有，尝试从环境变量获取
-        if not api_key:
-            api_key = os.getenv("DEEPL_API_KEY")
-        
-        if not api_key:
-            raise ValueError(
-                "未找到 DeepL API Key。请配置环境变量 DEEPL_API_KEY 或 "
-                "在 Streamlit secrets 中设置 DEEPL_API_KEY"
-            )
-        
-        # 根据 Key 后缀判断使用哪个 URL
-        if api_key.endswith(':fx'):
-            deepl_translator = deepl.Translator(
-                auth_key=api_key,
-                server_url="https://api-free.deepl.com"
-            )
-        else:
-            deepl_translator = deepl.Translator(auth_key=api_key)
+    # 双重检查：已初始化时无需加锁
+    if deepl_translator is not None:
+        return deepl_translator
+    
+    with _deepl_translator_lock:
+        if deepl_translator is None:
+            # 从环境变量或 Streamlit secrets 获取
+            api_key = get_deepl_key()
+            
+            if not api_key:
+                raise ValueError(
+                    "未找到 DeepL API Key。请配置环境变量 DEEPL_API_KEY 或 "
+                    "在 Streamlit secrets 中设置 DEEPL_API_KEY"
+                )
+            
+            # 关闭 SDK 内置的网络重试（默认 5 次、带自身退避），只保留 _retry_with_backoff 一层重试，
+            # 避免两层重试叠加；同时每个 429 都能立即反馈给自适应并发限制器
+            deepl.http_client.max_network_retries = 0
+            
+            # 根据 Key 后缀判断使用哪个 URL；不发送平台信息请求头，省去每次请求的额外开销
+            if api_key.endswith(':fx'):
+                deepl_translator = deepl.Translator(
+                    auth_key=api_key,
+                    server_url="https://api-free.deepl.com",
+                    send_platform_info=False
+                )
+            else:
+                deepl_translator = deepl.Translator(auth_key=api_key, send_platform_info=False)
     
     return deepl_translator
 
+# 全局 DeepSeek 客户端实例（按 API Key 复用，内部连接池在多次调用之间保持长连接）
+deepseek_client = None
+_deepseek_client_key = None
+_deepseek_client_lock = Lock()
+
+def _get_deepseek_client(api_key: str) -> OpenAI:
+    """
+    获取全局 DeepSeek 客户端实例（单例模式，API Key 变化时重新创建，线程安全）
+    """
+    global deepseek_client, _deepseek_client_key
+    
+    with _deepseek_client_lock:
+        if deepseek_client is None or _deepseek_client_key != api_key:
+            # 重试由 call_deepseek_api 自行处理，因此关闭 SDK 内置重试；
+            # 连接池设置上限，并发调用的线程共享已建立的长连接
+            deepseek_client = OpenAI(
+                api_key=api_key,
+                base_url="https://api.deepseek.com",
+                timeout=60.0,
+                max_retries=0,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+                    timeout=httpx.Timeout(60.0, connect=5.0)
+                )
+            )
+            _deepseek_client_key = api_key
+        
+        return deepseek_client
+
 # 术语库：从 glossary.json 加载
 # 用于减少 API 调用并提高翻译准确度
 def load_glossary() -> dict:
@@ -91,6 +128,22 @@ def load_glossary() -> dict:
 # 在模块加载时初始化术语库
 GLOSSARY = load_glossary()
 
+# 规范化的术语库：键去除首尾空白并做大小写折叠，"Lorem"、"lorem"、"Lorem " 都能命中同一条术语
+_GLOSSARY_NORM = {str(k).strip().casefold(): v for k, v in GLOSSARY.items()}
+
+
+def _lookup_glossary(text_stripped: str) -> Optional[str]:
+    """
+    在术语库中查找已去除首尾空白的文本（忽略大小写）
+    
+    参数:
+        text_stripped (str): 已去除首尾空白的文本
+    
+    返回:
+        Optional[str]: 术语库中的译文；未命中时返回 None
+    """
+    return _GLOSSARY_NORM.get(text_stripped.casefold())
+
 
 def call_deepseek_api(text: str, prompt: str, model: str = "deepseek-chat", max_retries: int = 3) -> str:
     """
@@ -127,11 +180,8 @@ def call_deepseek_api(text: str, prompt: str, model: str = "deepseek-chat", max_
             "在 Streamlit secrets 中设置 DEEPSEEK_API_KEY"
         )
     
-    # 初始化 OpenAI 客户端，使用 DeepSeek 的 base_url
-    client = OpenAI(
-        api_key=api_key,
-        base_url="https://api.deepseek.com"
-    )
+    # 获取复用的 OpenAI 客户端（DeepSeek 的 base_url），避免每次调用都重新建立连接
+    client = _get_deepseek_client(api_key)
     
     # 重试机制
     last_exception = None
@@ -159,10 +209,12 @@ def call_deepseek_api(text: str, prompt: str, model: str = "deepseek-chat", max_
             if "401" in error_msg or "unauthorized" in error_msg.lower():
                 raise Exception(f"认证失败：API Key 无效或已过期。请检查 .streamlit/secrets.toml 中的配置。")
             
-            # 如果是速率限制，等待更长时间后重试
+            # 如果是速率限制，优先按服务端 Retry-After 等待，否则按指数退避等待后重试
             if "429" in error_msg or "rate limit" in error_msg.lower():
                 if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 5  # 递增等待时间：5秒、10秒、15秒
+                    wait_time = _get_retry_after(e)
+                    if wait_time is None:
+                        wait_time = _backoff_delay(attempt, base_delay=2.0)
                     time.sleep(wait_time)
                     continue
                 else:
@@ -172,8 +224,7 @@ def call_deepseek_api(text: str, prompt: str, model: str = "deepseek-chat", max_
             if ("timeout" in error_msg.lower() or "timed out" in error_msg.lower() or 
                 "connection" in error_msg.lower() or "connect" in error_msg.lower()):
                 if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 2  # 递增等待时间：2秒、4秒、6秒
-                    time.sleep(wait_time)
+                    time.sleep(_backoff_delay(attempt))
                     continue
                 else:
                     if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
@@ -186,7 +237,7 @@ def call_deepseek_api(text: str, prompt: str, model: str = "deepseek-chat", max_
                 raise Exception(f"调用 DeepSeek API 时发生错误：{error_msg}")
             else:
                 # 其他错误也等待后重试
-                time.sleep(2)
+                time.sleep(_backoff_delay(attempt))
                 continue
     
     # 如果所有重试都失败
@@ -247,6 +298,53 @@ def generate_email_draft(
     return call_deepseek_api(user_input, system_prompt)
 
 
+@st.cache_data(ttl=1800, max_entries=128, show_spinner=False)
+def cached_generate_email_draft(
+    email_type: str,
+    tone: str,
+    language: str,
+    recipient: str,
+    subject: str,
+    key_points: str,
+    nonce: int = 0
+) -> str:
+    """
+    带缓存的 generate_email_draft：输入完全相同时30分钟内直接返回上次生成的草稿
+    
+    参数:
+        email_type, tone, language, recipient, subject, key_points: 同 generate_email_draft
+        nonce (int): 缓存区分值，"重新生成"时递增即可绕过缓存得到新的草稿
+    
+    返回:
+        str: 生成的邮件草稿正文
+    """
+    return generate_email_draft(
+        email_type=email_type,
+        tone=tone,
+        language=language,
+        recipient=recipient,
+        subject=subject,
+        key_points=key_points
+    )
+
+
+# 网址和邮箱地址不需要翻译
+_URL_OR_EMAIL_RE = re.compile(r'https?://\S+|www\.\S+|[^\s@]+@[^\s@]+\.[^\s@]+')
+
+# 不需要翻译的整段文本（预编译为一个正则，一次匹配完成所有检查）：
+# - 纯数字（含小数点、负号、百分比、货币符号等，且至少包含一个数字）
+# - 日期：2025-12-24、2025/12/24、12-24-2025、2025年12月24日
+# - 只包含标点符号和空白字符
+_SKIP_TRANSLATION_RE = re.compile(
+    r'(?=.*\d)[\d\s\.,\-+\%\$€¥]+'
+    r'|\d{4}[-/\.]\d{1,2}[-/\.]\d{1,2}'
+    r'|\d{1,2}[-/\.]\d{1,2}[-/\.]\d{4}'
+    r'|\d{4}年\d{1,2}月\d{1,2}日'
+    r'|[\s\.,;:!?\-_()\[\]{}"\']+',
+    re.DOTALL
+)
+
+
 def _should_translate_text(text: str) -> bool:
     """
     检查文本是否需要翻译
@@ -257,31 +355,29 @@ def _should_translate_text(text: str) -> bool:
     返回:
         bool: True表示需要翻译，False表示可以跳过
     """
-    text_stripped = text.strip()
+    return _should_translate_stripped(text.strip())
+
+
+def _should_translate_stripped(text_stripped: str) -> bool:
+    """
+    检查已去除首尾空白的文本是否需要翻译（调用方已 strip 时使用，避免重复处理）
     
+    参数:
+        text_stripped (str): 已去除首尾空白的文本
+    
+    返回:
+        bool: True表示需要翻译，False表示可以跳过
+    """
     # 如果为空，不需要翻译
     if not text_stripped:
         return False
     
-    # 检查是否为纯数字（包括小数、负数、科学计数法等）
-    # 匹配：纯数字、带小数点的数字、负数、百分比、货币等
-    if re.match(r'^[\d\s\.,\-+\%\$€¥]+$', text_stripped):
-        # 进一步检查是否包含至少一个数字
-        if re.search(r'\d', text_stripped):
-            return False
-    
-    # 检查是否为日期格式（如：2025-12-24, 2025/12/24, 2025.12.24等）
-    date_patterns = [
-        r'^\d{4}[-/\.]\d{1,2}[-/\.]\d{1,2}$',  # 2025-12-24, 2025/12/24
-        r'^\d{1,2}[-/\.]\d{1,2}[-/\.]\d{4}$',  # 12-24-2025
-        r'^\d{4}年\d{1,2}月\d{1,2}日$',  # 2025年12月24日
-    ]
-    for pattern in date_patterns:
-        if re.match(pattern, text_stripped):
-            return False
-    
-    # 检查是否只包含标点符号和空白字符
-    if re.match(r'^[\s\.,;:!?\-_()\[\]{}"\']+$', text_stripped):
+    # 纯数字 / 日期 / 纯标点，不需要翻译
+    if _SKIP_TRANSLATION_RE.fullmatch(text_stripped):
+        return False
+    
+    # 检查是否为单独的网址或邮箱地址
+    if _URL_OR_EMAIL_RE.fullmatch(text_stripped):
         return False
     
     # 其他情况需要翻译
@@ -308,13 +404,58 @@ def translate_text(text: str, target_language: str) -> str:
     # 检查术语库：只有当目标语言是英语时，才使用术语库
     # 术语库仅支持中文→英文方向
     text_stripped = text.strip()
-    if target_lang_code.upper().startswith("EN") and text_stripped in GLOSSARY:
-        return GLOSSARY[text_stripped]
+    if target_lang_code.upper().startswith("EN"):
+        glossary_translation = _lookup_glossary(text_stripped)
+        if glossary_translation is not None:
+            return glossary_translation
     
     # 如果不在术语库中或目标语言不是英语，使用 DeepL API 进行翻译
     return call_deepl_api(text, target_lang=target_lang_code)
 
 
+@st.cache_data(ttl=3600, max_entries=512, show_spinner=False)
+def cached_translate_text(text: str, target_language: str) -> str:
+    """
+    带缓存的 translate_text：相同的 (文本, 目标语言) 在1小时内直接返回缓存结果，不再请求 DeepL
+    
+    参数:
+        text (str): 要翻译的文本
+        target_language (str): 目标语言名称
+    
+    返回:
+        str: 翻译后的文本
+    """
+    return translate_text(text, target_language)
+
+
+# 语言名称 -> DeepL 语言代码
+_DEEPL_LANG_MAP = {
+    "中文": "ZH",
+    "简体中文": "ZH",
+    "英语": "EN-US",
+    "英文": "EN-US",  # 添加"英文"映射
+    "日语": "JA",
+    "法语": "FR",
+    "德语": "DE",
+    "西班牙语": "ES",
+    "俄语": "RU",
+    "韩语": "KO",
+    "意大利语": "IT",
+    "葡萄牙语": "PT",
+    "阿拉伯语": "AR",
+    "泰语": "TH",
+    "越南语": "VI",
+    "印尼语": "ID",
+    "荷兰语": "NL",
+    "瑞典语": "SV",
+    "挪威语": "NO",
+    "丹麦语": "DA",
+    "芬兰语": "FI",
+    "波兰语": "PL",
+    "土耳其语": "TR"
+}
+
+
 def _get_deepl_lang_code(language_name: str) -> str:
     """
     将语言名称转换为 DeepL 语言代码
@@ -325,33 +466,301 @@ def _get_deepl_lang_code(language_name: str) -> str:
     返回:
         str: DeepL 语言代码（如：EN-US、JA、FR 等）
     """
-    language_map = {
-        "中文": "ZH",
-        "简体中文": "ZH",
-        "英语": "EN-US",
-        "英文": "EN-US",  # 添加"英文"映射
-        "日语": "JA",
-        "法语": "FR",
-        "德语": "DE",
-        "西班牙语": "ES",
-        "俄语": "RU",
-        "韩语": "KO",
-        "意大利语": "IT",
-        "葡萄牙语": "PT",
-        "阿拉伯语": "AR",
-        "泰语": "TH",
-        "越南语": "VI",
-        "印尼语": "ID",
-        "荷兰语": "NL",
-        "瑞典语": "SV",
-        "挪威语": "NO",
-        "丹麦语": "DA",
-        "芬兰语": "FI",
-        "波兰语": "PL",
-        "土耳其语": "TR"
-    }
     # 默认返回英语（美式）
-    return language_map.get(language_name, "EN-US")
+    return _DEEPL_LANG_MAP.get(language_name, "EN-US")
+
+
+def _backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 30.0) -> float:
+    """
+    计算第 attempt 次重试前的等待秒数（指数退避 + 完全随机抖动）
+    
+    参数:
+        attempt (int): 已失败的次数（从0开始）
+        base_delay (float): 基础等待秒数
+        max_delay (float): 等待上限秒数
+    
+    返回:
+        float: 在 [0, min(max_delay, base_delay * 2^attempt)] 内随机取值的等待秒数
+    """
+    # 随机抖动：避免多个线程同时重试
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def _get_retry_after(exc: Exception, max_wait: float = 60.0) -> Optional[float]:
+    """
+    从异常携带的 HTTP 响应中读取 Retry-After 头（秒数）
+    
+    参数:
+        exc (Exception): 捕获到的异常（如 openai.RateLimitError）
+        max_wait (float): 等待上限秒数，避免服务端给出过长的等待时间
+    
+    返回:
+        Optional[float]: 建议等待的秒数；没有响应或无法解析时返回 None
+    """
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        retry_after = float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+    return min(max(retry_after, 0.0), max_wait)
+
+
+def _retry_with_backoff(func, retry_on: tuple, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 30.0):
+    """
+    调用 func，遇到可重试的异常时按指数退避（带随机抖动）重试
+    
+    参数:
+        func (callable): 无参数的调用函数
+        retry_on (tuple): 需要重试的异常类型
+        max_retries (int): 最大重试次数（不含首次调用），默认为3次
+        base_delay (float): 首次重试前的基础等待秒数
+        max_delay (float): 单次等待的最大秒数
+    
+    返回:
+        func 的返回值
+    
+    异常:
+        重试次数用完后，重新抛出最后一次的异常
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except retry_on as e:
+            if attempt == max_retries:
+                raise
+            # 服务端给出 Retry-After 时按其等待，否则指数退避（带随机抖动）
+            wait_time = _get_retry_after(e)
+            if wait_time is None:
+                wait_time = _backoff_delay(attempt, base_delay, max_delay)
+            logger.warning("请求失败（%s），%.1f 秒后进行第 %d 次重试", type(e).__name__, wait_time, attempt + 1)
+            time.sleep(wait_time)
+
+
+# DeepL 中可以通过重试恢复的临时错误（速率限制、网络连接问题）
+_DEEPL_RETRYABLE_ERRORS = (deepl.exceptions.TooManyRequestsException, deepl.exceptions.ConnectionException)
+
+
+class _AimdLimiter:
+    """
+    自适应并发限制器（加性增、乘性减，AIMD）
+    
+    请求成功时缓慢提高允许的并发数（每完成约一轮并发数的请求 +1），
+    遇到速率限制时立即减半，使并发数自动收敛到账户实际可承受的水平。
+    """
+    
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 8):
+        self._limit = float(initial)
+        self._minimum = minimum
+        self._maximum = maximum
+        self._in_flight = 0
+        self._cond = Condition()
+    
+    def acquire(self):
+        """等待直到当前并发数低于限制，然后占用一个名额"""
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+    
+    def release(self, throttled: bool = False):
+        """
+        释放名额，并根据本次请求的结果调整并发限制
+        
+        参数:
+            throttled (bool): 本次请求是否被速率限制（429）
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self._limit = max(self._minimum, self._limit / 2)
+            else:
+                self._limit = min(self._maximum, self._limit + 1 / self._limit)
+            self._cond.notify_all()
+
+
+# 所有 DeepL 请求共享的并发限制（速率限制按账户计算，因此在进程内全局共享）
+_deepl_limiter = _AimdLimiter(initial=min(4, DEEPL_MAX_WORKERS), maximum=DEEPL_MAX_WORKERS)
+
+
+def _call_deepl_limited(func):
+    """
+    在自适应并发限制下执行一次 DeepL 请求
+    
+    参数:
+        func (callable): 无参数的请求函数
+    
+    返回:
+        func 的返回值
+    """
+    _deepl_limiter.acquire()
+    throttled = False
+    try:
+        return func()
+    except deepl.exceptions.TooManyRequestsException:
+        throttled = True
+        raise
+    finally:
+        _deepl_limiter.release(throttled)
+
+
+# 进程级翻译结果缓存：{(原文, 目标语言代码): 译文}，按最近使用淘汰（LRU）
+# 在多次重新运行、多个会话和多个文档之间共享，相同句子不会重复请求 DeepL、重复消耗额度
+# 除条目数外还限制缓存的总字符数（原文 + 译文），使内存占用有上限；
+# 超长文本（如整页粘贴的文本）不进入缓存，它们已由文本翻译页的 st.cache_data 缓存，且很少原样重复
+_TRANSLATION_CACHE_MAX_ENTRIES = 20_000
+_TRANSLATION_CACHE_MAX_CHARS = 4_000_000
+_TRANSLATION_CACHE_MAX_TEXT_CHARS = 8_000
+_translation_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_translation_cache_chars = 0
+_translation_cache_lock = Lock()
+
+
+def _get_cached_translation(text: str, target_lang: str) -> Optional[str]:
+    """
+    从进程级缓存中读取译文（线程安全）
+    
+    参数:
+        text (str): 原文
+        target_lang (str): 目标语言代码
+    
+    返回:
+        Optional[str]: 缓存的译文；未命中时返回 None
+    """
+    key = (text, target_lang)
+    with _translation_cache_lock:
+        translation = _translation_cache.get(key)
+        if translation is not None:
+            _translation_cache.move_to_end(key)
+        return translation
+
+
+def _store_cached_translation(text: str, target_lang: str, translation: str):
+    """
+    将译文写入进程级缓存，超出条目数或总字符数上限时淘汰最久未使用的条目（线程安全）
+    
+    超过 _TRANSLATION_CACHE_MAX_TEXT_CHARS 的原文或译文不写入缓存
+    
+    参数:
+        text (str): 原文
+        target_lang (str): 目标语言代码
+        translation (str): 译文
+    """
+    global _translation_cache_chars
+    
+    if len(text) > _TRANSLATION_CACHE_MAX_TEXT_CHARS or len(translation) > _TRANSLATION_CACHE_MAX_TEXT_CHARS:
+        return
+    
+    key = (text, target_lang)
+    with _translation_cache_lock:
+        previous = _translation_cache.get(key)
+        if previous is not None:
+            _translation_cache_chars -= len(text) + len(previous)
+        _translation_cache[key] = translation
+        _translation_cache.move_to_end(key)
+        _translation_cache_chars += len(text) + len(translation)
+        while (len(_translation_cache) > _TRANSLATION_CACHE_MAX_ENTRIES
+               or _translation_cache_chars > _TRANSLATION_CACHE_MAX_CHARS):
+            (old_text, _), old_translation = _translation_cache.popitem(last=False)
+            _translation_cache_chars -= len(old_text) + len(old_translation)
+
+
+def _json_encoded_size(text: str) -> int:
+    """
+    计算文本在 DeepL 请求体中占用的字节数
+    
+    DeepL SDK 通过 requests 的 json= 参数发送请求，json.dumps 默认 ensure_ascii=True，
+    每个非 ASCII 字符都会被转义为 6 字节的 \\uXXXX（超出 BMP 的字符为 12 字节），
+    因此中日韩文本在线路上的大小约为 UTF-8 编码的 2 倍
+    
+    参数:
+        text (str): 要计算的文本
+    
+    返回:
+        int: JSON 编码后的字节数（含两侧引号）
+    """
+    return len(json.dumps(text))
+
+
+# 长文本拆分时使用的句末位置（中英文句号、问号、感叹号之后）
+_SENTENCE_END_RE = re.compile(r'(?<=[。！？!?\.])')
+
+
+def _split_by_bytes(text: str, max_bytes: int) -> List[str]:
+    """
+    按 UTF-8 字节数硬性切分文本（切分点落在字符边界上，不会截断多字节字符）
+    
+    参数:
+        text (str): 要切分的文本
+        max_bytes (int): 每块的最大字节数
+    
+    返回:
+        list[str]: 文本块列表，按顺序拼接即为原文
+    """
+    data = text.encode("utf-8")
+    chunks = []
+    start = 0
+    while start < len(data):
+        end = min(start + max_bytes, len(data))
+        # 切分点落在多字节字符中间（续字节为 10xxxxxx）时向前退到字符起始位置
+        while end < len(data) and end > start and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        if end == start:
+            # max_bytes 小于单个字符的字节数，至少保留一个完整字符
+            end = start + 1
+            while end < len(data) and (data[end] & 0xC0) == 0x80:
+                end += 1
+        chunks.append(data[start:end].decode("utf-8"))
+        start = end
+    return chunks
+
+
+def _split_for_deepl(text: str, max_bytes: int = 40_000) -> List[str]:
+    """
+    将长文本按段落（必要时按句子，再不行按字节）拆分为若干块，每块的 UTF-8 大小不超过 max_bytes
+    
+    参数:
+        text (str): 要拆分的文本
+        max_bytes (int): 每块的最大字节数（DeepL 单次请求体上限为 128 KiB）
+    
+    返回:
+        list[str]: 文本块列表，按顺序拼接即为原文
+    """
+    if len(text.encode("utf-8")) <= max_bytes:
+        return [text]
+    
+    # 先按行拆分（保留换行符），超长的行再按句子拆分，仍然超长的句子最后按字节硬性切分
+    pieces = []
+    for line in text.splitlines(keepends=True):
+        if len(line.encode("utf-8")) <= max_bytes:
+            pieces.append(line)
+            continue
+        for part in _SENTENCE_END_RE.split(line):
+            if not part:
+                continue
+            if len(part.encode("utf-8")) <= max_bytes:
+                pieces.append(part)
+            else:
+                pieces.extend(_split_by_bytes(part, max_bytes))
+    
+    # 贪心合并相邻片段，直到接近字节上限
+    chunks = []
+    current = []
+    current_bytes = 0
+    for piece in pieces:
+        piece_bytes = len(piece.encode("utf-8"))
+        if current and current_bytes + piece_bytes > max_bytes:
+            chunks.append("".join(current))
+            current = []
+            current_bytes = 0
+        current.append(piece)
+        current_bytes += piece_bytes
+    if current:
+        chunks.append("".join(current))
+    
+    return chunks
 
 
 def call_deepl_api(text: str, target_lang: str = "EN-US") -> str:
@@ -375,23 +784,51 @@ def call_deepl_api(text: str, target_lang: str = "EN-US") -> str:
     说明:
         - 优先检查本地术语库（GLOSSARY），如果存在则直接返回，不消耗 DeepL 额度
         - 术语库仅适用于翻译到英语（target_lang 以 "EN" 开头）
+        - 之前翻译过的相同文本从进程级缓存中直接返回
         - 如果不在术语库中或目标语言不是英语，则调用 DeepL API 进行翻译
     """
     # 检查术语库：只有当目标语言是英语时，才使用术语库
     text_stripped = text.strip()
-    if target_lang.upper().startswith("EN") and text_stripped in GLOSSARY:
-        return GLOSSARY[text_stripped]
+    if target_lang.upper().startswith("EN"):
+        glossary_translation = _lookup_glossary(text_stripped)
+        if glossary_translation is not None:
+            return glossary_translation
     
-    # 如果不在术语库中，调用 DeepL API
+    # 之前翻译过的相同文本直接返回缓存结果
+    cached = _get_cached_translation(text, target_lang)
+    if cached is not None:
+        return cached
+    
+    # 如果不在术语库和缓存中，调用 DeepL API
     try:
         # 获取 DeepL 翻译器实例
         translator = _get_deepl_translator()
         
-        # 调用 DeepL API 进行翻译
-        result = translator.translate_text(text, target_lang=target_lang)
+        def _translate_one(source: str) -> str:
+            # 调用 DeepL API 进行翻译（临时错误自动重试）
+            result = _retry_with_backoff(
+                lambda: _call_deepl_limited(lambda: translator.translate_text(source, target_lang=target_lang)),
+                _DEEPL_RETRYABLE_ERRORS
+            )
+            return result.text
         
-        # 返回翻译结果
-        return result.text
+        # 超长文本拆分为多块并发翻译，避免超出请求体上限，也缩短整体等待时间
+        chunks = _split_for_deepl(text)
+        if len(chunks) == 1:
+            translation = _translate_one(text)
+        else:
+            def _translate_chunk(chunk: str) -> str:
+                # 块末尾的换行等空白单独保留，拼接后与原文的段落结构一致
+                body = chunk.rstrip()
+                if not body:
+                    return chunk
+                return _translate_one(body) + chunk[len(body):]
+            
+            with ThreadPoolExecutor(max_workers=min(DEEPL_MAX_WORKERS, len(chunks))) as executor:
+                translation = "".join(executor.map(_translate_chunk, chunks))
+        
+        _store_cached_translation(text, target_lang, translation)
+        return translation
         
     except ValueError as e:
         # API Key 未配置的错误已经在 _get_deepl_translator() 中处理
@@ -411,13 +848,14 @@ def call_deepl_api(text: str, target_lang: str = "EN-US") -> str:
         raise Exception(f"调用 DeepL API 时发生未知错误：{str(e)}")
 
 
-def call_deepl_api_batch(texts: List[str], target_lang: str = "EN-US") -> List[str]:
+def call_deepl_api_batch(texts: List[str], target_lang: str = "EN-US", max_retries: int = 3) -> List[str]:
     """
     使用 DeepL API 批量翻译文本列表（批处理模式，更高效）
     
     参数:
         texts (list[str]): 要翻译的文本列表
         target_lang (str): 目标语言代码，默认为 "EN-US"（美式英语）
+        max_retries (int): 遇到速率限制或连接错误时的最大重试次数，默认为3次
     
     返回:
         list[str]: 翻译后的文本列表，顺序与输入列表一致
@@ -429,6 +867,7 @@ def call_deepl_api_batch(texts: List[str], target_lang: str = "EN-US") -> List[s
     说明:
         - 优先检查本地术语库（GLOSSARY），如果存在则直接返回，不消耗 DeepL 额度
         - 术语库仅适用于翻译到英语（target_lang 以 "EN" 开头）
+        - 之前翻译过的相同文本从进程级缓存中直接获取，只有未命中的文本才发送给 API
         - 如果不在术语库中或目标语言不是英语，则调用 DeepL API 进行批量翻译
         - 批处理模式比单条翻译更高效，减少网络开销
     """
@@ -438,21 +877,26 @@ def call_deepl_api_batch(texts: List[str], target_lang: str = "EN-US") -> List[s
     # 检查目标语言是否为英语（术语库仅适用于中译英）
     is_target_english = target_lang.upper().startswith("EN")
     
-    # 分离需要从术语库获取的文本和需要 API 翻译的文本
-    glossary_results = {}  # {索引: 翻译文本}
+    # 分离可以从术语库或缓存获取的文本和需要 API 翻译的文本
+    glossary_results = {}  # {索引: 翻译文本}（术语库或缓存命中）
     api_texts = []  # 需要 API 翻译的文本列表
     api_indices = []  # 对应的原始索引列表
     
     for idx, text in enumerate(texts):
-        text_stripped = text.strip()
         # 只有当目标语言是英语时，才使用术语库
-        if is_target_english and text_stripped in GLOSSARY:
-            glossary_results[idx] = GLOSSARY[text_stripped]
+        glossary_translation = _lookup_glossary(text.strip()) if is_target_english else None
+        if glossary_translation is not None:
+            glossary_results[idx] = glossary_translation
+            continue
+        # 之前翻译过的相同文本直接使用缓存结果
+        cached = _get_cached_translation(text, target_lang)
+        if cached is not None:
+            glossary_results[idx] = cached
         else:
             api_texts.append(text)
             api_indices.append(idx)
     
-    # 如果所有文本都在术语库中，直接返回
+    # 如果所有文本都在术语库或缓存中，直接返回
     if not api_texts:
         return [glossary_results.get(i, texts[i]) for i in range(len(texts))]
     
@@ -460,8 +904,12 @@ def call_deepl_api_batch(texts: List[str], target_lang: str = "EN-US") -> List[s
     try:
         translator = _get_deepl_translator()
         
-        # 批量翻译
-        results = translator.translate_text(api_texts, target_lang=target_lang)
+        # 批量翻译（临时错误自动重试，只重发当前批次）
+        results = _retry_with_backoff(
+            lambda: _call_deepl_limited(lambda: translator.translate_text(api_texts, target_lang=target_lang)),
+            _DEEPL_RETRYABLE_ERRORS,
+            max_retries=max_retries
+        )
         
         # 处理结果：results 可能是单个结果或结果列表
         if isinstance(results, list):
@@ -470,6 +918,10 @@ def call_deepl_api_batch(texts: List[str], target_lang: str = "EN-US") -> List[s
             # 如果只有一个结果，DeepL 可能返回单个对象
             api_translations = [results.text]
         
+        # 写入缓存，之后相同的文本不再请求 API
+        for text, translation in zip(api_texts, api_translations):
+            _store_cached_translation(text, target_lang, translation)
+        
         # 构建完整的翻译结果列表
         final_results = []
         api_idx = 0
@@ -502,6 +954,85 @@ def call_deepl_api_batch(texts: List[str], target_lang: str = "EN-US") -> List[s
         raise Exception(f"调用 DeepL API 时发生未知错误：{str(e)}")
 
 
+# 临时文件目录（首次使用时创建）
+_TEMP_DIR = Path("temp")
+_temp_dir_ready = False
+
+
+def _get_temp_dir() -> Path:
+    """
+    获取临时文件目录，只在进程内首次调用时创建目录
+    
+    返回:
+        Path: 临时文件目录
+    """
+    global _temp_dir_ready
+    
+    if not _temp_dir_ready:
+        _TEMP_DIR.mkdir(exist_ok=True)
+        _temp_dir_ready = True
+    return _TEMP_DIR
+
+
+def cleanup_temp_files(temp_dir: Path = _TEMP_DIR, keep_files: list = None, max_age: float = 3600):
+    """
+    清理临时文件夹中超过 max_age 秒未修改的文件
+    
+    多个会话共用的 PDF 转换缓存（converted_*.docx）每次命中时都会刷新修改时间，
+    因此只有长时间没有被使用的缓存才会被清理；转换中的文件（converting_*）同样按修改时间判断
+    
+    参数:
+        temp_dir: 临时目录路径
+        keep_files: 需要保留的文件列表（完整路径）
+        max_age: 文件的最长保留时间（秒），默认为1小时
+    """
+    if not temp_dir.exists():
+        return
+    
+    # 使用解析后的绝对路径字符串进行集合比较（O(1) 查找）
+    keep_set = frozenset(os.fspath(Path(f).resolve()) for f in (keep_files or ()))
+    
+    # os.scandir 在遍历目录时即返回文件类型信息，DirEntry.stat() 的结果会被缓存
+    cutoff = time.time() - max_age
+    with os.scandir(temp_dir.resolve()) as entries:
+        for entry in entries:
+            if entry.path in keep_set:
+                continue
+            try:
+                if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError:
+                # 如果删除失败，忽略（可能文件正在使用）
+                pass
+
+
+def save_stream_to_file(src, file_path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    将文件对象分块写入磁盘，同时计算内容摘要
+    
+    参数:
+        src: 可读取的文件对象（如 Streamlit UploadedFile 对象）
+        file_path: 目标文件路径
+        chunk_size (int): 每次读取/写入的字节数，默认为 1MB
+    
+    返回:
+        str: 文件内容的 BLAKE2b 摘要（十六进制，32 个字符），可用于识别重复上传的文件
+    
+    说明:
+        - 按块读写，内存占用与 chunk_size 相关，而不是与文件大小相关
+        - 读取从文件对象的当前位置开始
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "wb", buffering=chunk_size) as f:
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+
 def handle_pdf_processing(pdf_file) -> Tuple[Optional[str], Optional[str]]:
     """
     处理PDF文件：检查是否可提取文本，并转换为Word格式
@@ -518,51 +1049,60 @@ def handle_pdf_processing(pdf_file) -> Tuple[Optional[str], Optional[str]]:
         - 如果PDF是扫描版（无法提取文本），返回错误信息
         - 如果转换失败，抛出异常并返回错误信息
     """
+    # 延迟导入：pdf2docx 依赖较重，只在处理 PDF 时才加载
+    # fitz（PyMuPDF）是 pdf2docx 自带的依赖，用它检查文本比 PyPDF2 解析整个文件快得多
+    import fitz
+    from pdf2docx import Converter
+    
     try:
-        # 步骤1：检查PDF是否包含可识别文本
-        # 将文件指针重置到开头
-        pdf_file.seek(0)
-        
-        # 使用PyPDF2读取PDF文件
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        # 检查PDF是否有页面
-        if len(pdf_reader.pages) == 0:
-            return None, "PDF文件为空，无法处理"
-        
-        # 读取第一页并提取文本
-        first_page = pdf_reader.pages[0]
-        extracted_text = first_page.extract_text()
-        
-        # 检查提取的文本长度（少于10个字符认为是扫描版）
-        if len(extracted_text.strip()) < 10:
-            return None, "检测到是扫描版PDF，暂不支持"
-        
-        # 步骤2：转换PDF为Word格式
         # 创建temp文件夹（如果不存在）
-        temp_dir = Path("temp")
-        temp_dir.mkdir(exist_ok=True)
+        temp_dir = _get_temp_dir()
         
         # 生成唯一的临时文件名
         unique_id = str(uuid.uuid4())
         temp_pdf_path = temp_dir / f"temp_{unique_id}.pdf"
-        output_docx_path = temp_dir / f"converted_{unique_id}.docx"
-        
-        # 将上传的文件保存到临时位置
-        pdf_file.seek(0)  # 重置文件指针
-        with open(temp_pdf_path, "wb") as f:
-            f.write(pdf_file.read())
         
-        # 使用pdf2docx进行转换
         try:
-            cv = Converter(str(temp_pdf_path))
-            cv.convert(str(output_docx_path))
-            cv.close()
-        except Exception as e:
-            # 清理临时文件
-            if temp_pdf_path.exists():
-                temp_pdf_path.unlink()
-            raise Exception(f"PDF转Word失败：{str(e)}")
+            # 步骤1：将上传的文件分块保存到临时位置，同时计算内容摘要
+            pdf_file.seek(0)  # 重置文件指针
+            content_digest = save_stream_to_file(pdf_file, temp_pdf_path)
+            
+            # 转换结果按PDF内容摘要命名：同一PDF再次上传（如换一种目标语言重试）时直接复用
+            output_docx_path = temp_dir / f"converted_{content_digest}.docx"
+            try:
+                # 命中缓存时刷新修改时间，临时文件清理按修改时间判断，仍在使用的缓存不会被删除
+                os.utime(output_docx_path)
+                return str(output_docx_path), None
+            except FileNotFoundError:
+                # 没有缓存（或刚好被清理删除），重新转换
+                pass
+            
+            # 步骤2：检查PDF是否包含可识别文本
+            # 使用PyMuPDF打开已保存的临时PDF文件（按需解析页面，只读取第一页的内容）
+            with fitz.open(str(temp_pdf_path)) as pdf_doc:
+                # 检查PDF是否有页面
+                if pdf_doc.page_count == 0:
+                    return None, "PDF文件为空，无法处理"
+                
+                # 读取第一页并提取文本
+                extracted_text = pdf_doc[0].get_text()
+            
+            # 检查提取的文本长度（少于10个字符认为是扫描版）
+            if len(extracted_text.strip()) < 10:
+                return None, "检测到是扫描版PDF，暂不支持"
+            
+            # 步骤3：使用pdf2docx转换为Word格式
+            # 先写入临时文件名，转换完成后再重命名，避免中途失败留下不完整的缓存文件
+            partial_docx_path = temp_dir / f"converting_{unique_id}.docx"
+            try:
+                cv = Converter(str(temp_pdf_path))
+                cv.convert(str(partial_docx_path))
+                cv.close()
+                os.replace(partial_docx_path, output_docx_path)
+            except Exception as e:
+                if partial_docx_path.exists():
+                    partial_docx_path.unlink()
+                raise Exception(f"PDF转Word失败：{str(e)}")
         finally:
             # 删除临时PDF文件
             if temp_pdf_path.exists():
@@ -580,7 +1120,7 @@ def handle_pdf_processing(pdf_file) -> Tuple[Optional[str], Optional[str]]:
         return None, f"处理PDF文件时发生错误：{error_msg}"
 
 
-def translate_word_document(docx_path: str, target_language: str, progress_callback=None) -> str:
+def translate_word_document(docx_path: str, target_language: str, progress_callback=None, output_path: Union[str, IO[bytes]] = None) -> Union[str, IO[bytes]]:
     """
     翻译Word文档中的所有段落文本和表格内容（使用多线程并发模式优化性能）
     
@@ -588,21 +1128,29 @@ def translate_word_document(docx_path: str, target_language: str, progress_callb
         docx_path (str): Word文件的路径
         target_language (str): 目标语言名称（如：英语、日语、法语等）
         progress_callback (callable, optional): 进度回调函数，接收 (current, total, status) 参数
+        output_path (str | 文件对象, optional): 输出文件路径，如果为 None 则保存到原文件所在目录；
+            也可以传入可写的文件对象（如 io.BytesIO），直接在内存中保存，不写入磁盘
     
     返回:
-        str: 翻译后保存的新文件路径
+        str | 文件对象: 翻译后保存的新文件路径（传入文件对象时原样返回该对象）
     
     异常:
         Exception: 当文件读取、翻译或保存失败时抛出异常
     
     处理逻辑:
         1. 使用python-docx加载Word文档
-        2. 收集所有需要翻译的段落（正文+表格）
-        3. 先处理术语库中的文本（直接应用，不占用线程池）
-        4. 对需要API翻译的文本，使用ThreadPoolExecutor并发执行（max_workers=5）
+        2. 按文档顺序一次遍历所有段落元素（正文+表格）
+        3. 术语库中的文本直接应用，不占用线程池
+        4. 需要API翻译的文本每凑满一批即提交给ThreadPoolExecutor（max_workers=DEEPL_MAX_WORKERS，默认 8），
+           文档遍历与API请求同时进行；实际同时发出的请求数由 AIMD 自适应限流器控制，
+           遇到 429 限流时自动减半，请求成功后逐步恢复
         5. 确保翻译结果按顺序填回文档
         6. 将翻译好的文档保存为新文件
     """
+    # 延迟导入：只在翻译 Word 文档时才加载 python-docx
+    from docx import Document
+    from docx.text.paragraph import Paragraph
+    
     # 检查目标语言是否为英语（术语库仅适用于中译英）
     is_target_english = "英" in target_language or "English" in target_language
     
@@ -616,8 +1164,16 @@ def translate_word_document(docx_path: str, target_language: str, progress_callb
             paragraph: python-docx 的段落对象
             translated_text (str): 翻译后的文本
         """
-        paragraph.clear()
-        paragraph.add_run(translated_text)
+        runs = paragraph.runs
+        # 段落文本全部来自普通 run 时，只改写 run 的文本：译文写入第一个 run（保留其字体、加粗、颜色等格式），
+        # 其余 run 置空但不删除；如果有超链接等 run 之外的文本，则退回为清空段落后重新添加
+        if runs and "".join(run.text for run in runs) == paragraph.text:
+            runs[0].text = translated_text
+            for run in runs[1:]:
+                run.text = ""
+        else:
+            paragraph.clear()
+            paragraph.add_run(translated_text)
     
     def _translate_batch_task(batch_data: Tuple[List, str]) -> Tuple[List, List[str], Optional[Exception]]:
         """
@@ -640,7 +1196,8 @@ def translate_word_document(docx_path: str, target_language: str, progress_callb
             texts = [task[1] for task in task_list]
             
             # 调用 DeepL 批量翻译 API（不需要 Prompt）
-            translated_texts = call_deepl_api_batch(texts, target_lang_code)
+            # 速率限制等临时错误在工作线程内按指数退避重试，不阻塞主线程收集其他批次的结果
+            translated_texts = call_deepl_api_batch(texts, target_lang_code, max_retries=5)
             
             return (task_list, translated_texts, None)
         except Exception as e:
@@ -658,157 +1215,164 @@ def translate_word_document(docx_path: str, target_language: str, progress_callb
         if progress_callback:
             progress_callback(0, 0, "正在分析文档结构...")
         
-        # ========== 第一步：收集所有待翻译任务 ==========
-        # 任务格式：(任务索引, 待翻译文本, paragraph对象, 目标语言)
-        translation_tasks = []
-        
-        # 收集正文段落
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-            if text and len(text) <= 8000:  # 跳过超长段落
-                # 检查是否需要翻译（跳过纯数字、日期等）
-                if _should_translate_text(text):
-                    translation_tasks.append((len(translation_tasks), text, paragraph, target_language))
-        
-        # 收集表格单元格中的段落
-        for table_idx, table in enumerate(doc.tables):
-            for row_idx, row in enumerate(table.rows):
-                for col_idx, cell in enumerate(row.cells):
-                    for para_idx, paragraph in enumerate(cell.paragraphs):
-                        text = paragraph.text.strip()
-                        if text and len(text) <= 8000:  # 跳过超长段落
-                            # 检查是否需要翻译（跳过纯数字、日期等）
-                            if _should_translate_text(text):
-                                translation_tasks.append((len(translation_tasks), text, paragraph, target_language))
-                            else:
-                                # 不需要翻译的段落（纯数字、日期等），保留原文
-                                pass
-        
-        total_count = len(translation_tasks)
+        # ========== 第一步：按文档顺序逐个产生待翻译任务（生成器，边遍历边提交）==========
+        # 任务格式：(任务索引, 待翻译文本, paragraph对象)；目标语言对所有任务相同，不再逐个保存
+        def _iter_candidate_paragraphs():
+            # 用一次 XPath 查询按文档顺序取得正文段落和表格单元格中的段落（含嵌套表格），
+            # 不经过 doc.paragraphs / table.rows / row.cells 逐层构建对象；
+            # 合并单元格在 XML 中只对应一个 <w:tc>，因此也不会重复产生同一段落。
+            # xpath() 返回的是列表，之后修改段落内容不会影响遍历
+            body = doc._body
+            for p_element in body._element.xpath('./w:p | ./w:tbl//w:tc/w:p'):
+                yield Paragraph(p_element, body)
+        
+        def _iter_translation_tasks():
+            task_idx = 0
+            for paragraph in _iter_candidate_paragraphs():
+                # paragraph.text 需要拼接所有 run，每个段落只读取并 strip 一次，后续步骤直接使用
+                text = paragraph.text.strip()
+                # 跳过空段落和超长段落；跳过纯数字、日期等不需要翻译的内容（保留原文）
+                if text and len(text) <= 8000 and _should_translate_stripped(text):
+                    yield (task_idx, text, paragraph)
+                    task_idx += 1
+        
+        total_count = 0
         processed = 0
         failed = 0
         
-        if progress_callback:
-            progress_callback(0, total_count, f"开始翻译，共 {total_count} 个段落...")
-        
-        # ========== 第二步：先处理术语库中的文本（直接应用，不占用线程池）==========
+        # ========== 第二步：术语库命中的文本直接应用；其余文本凑满一批即提交到线程池 ==========
+        # 这样在 python-docx 遍历文档的同时，已提交的批次就在等待 API 响应，遍历与网络请求相互重叠
         api_tasks = []  # 需要API翻译的任务列表
-        glossary_results = {}  # 术语库翻译结果：{任务索引: 翻译文本}
-        
-        for task_idx, text, paragraph, _ in translation_tasks:
-            text_stripped = text.strip()
-            # 只有当目标语言是英语时，才使用术语库
-            if is_target_english and text_stripped in GLOSSARY:
-                # 命中术语库：直接应用翻译
-                _apply_translation_to_paragraph(paragraph, GLOSSARY[text_stripped])
-                glossary_results[task_idx] = GLOSSARY[text_stripped]
-                processed += 1
-            else:
-                # 未命中术语库或目标语言不是英语：加入API翻译任务列表
-                api_tasks.append((task_idx, text, paragraph, target_language))
+        first_task_by_text = {}  # 文本 -> 首次出现该文本的任务索引（同一文档内相同文本只请求一次）
+        duplicate_tasks = []  # 重复文本的任务列表：[(任务, 首次出现的任务索引), ...]
+        
+        # 将语言名称转换为 DeepL 语言代码
+        target_lang_code = _get_deepl_lang_code(target_language)
+        
+        batch_size = 50  # 每 50 个任务一批（DeepL 单次请求最多 50 条文本）
+        batch_max_bytes = 120 * 1024  # 每批文本 JSON 编码后的总大小上限（DeepL 请求体上限为 128 KiB，预留参数开销）
+        max_workers = DEEPL_MAX_WORKERS  # 最大并发数
+        task_batches = []
+        future_to_batch = {}
+        
+        # 用于线程安全的进度更新
+        progress_lock = Lock()
+        completed_batches = [0]  # 使用列表以便在闭包中修改
+        translated_count = [0]  # API 翻译成功的任务数（递增计数，无需每次重新统计结果字典）
+        last_progress_time = [0.0]  # 上一次回调进度的时间
+        progress_interval = 0.1  # 进度回调的最小间隔（秒），每次回调都会触发一次界面更新
+        
+        def _report_batch_progress(status_suffix: str):
+            # 批次完成时更新进度：最多每 progress_interval 秒回调一次，最后一批完成时一定回调
+            if not progress_callback:
+                return
+            now = time.monotonic()
+            is_last = completed_batches[0] == len(task_batches)
+            if not is_last and now - last_progress_time[0] < progress_interval:
+                return
+            last_progress_time[0] = now
+            current_processed = processed + translated_count[0]
+            progress_callback(
+                current_processed,
+                total_count,
+                f"翻译进度：{current_processed}/{total_count} {status_suffix}"
+            )
         
-        # ========== 第三步：将任务分批并使用线程池并发执行API翻译 ==========
-        if api_tasks:
-            # 将语言名称转换为 DeepL 语言代码
-            target_lang_code = _get_deepl_lang_code(target_language)
+        # 存储翻译结果：{任务索引: (翻译文本, 异常)}
+        translation_results = {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            def _submit_batch(batch):
+                batch_data = (batch, target_lang_code)
+                task_batches.append(batch_data)
+                future_to_batch[executor.submit(_translate_batch_task, batch_data)] = batch_data
             
-            # 将任务分批（每 50 个一组）
-            batch_size = 50
-            task_batches = []
-            for i in range(0, len(api_tasks), batch_size):
-                batch = api_tasks[i:i + batch_size]
-                task_batches.append((batch, target_lang_code))
+            current_batch = []
+            current_batch_bytes = 0
+            for task in _iter_translation_tasks():
+                total_count += 1
+                # 任务中的文本已去除首尾空白
+                task_idx, text, paragraph = task
+                # 只有当目标语言是英语时，才使用术语库
+                glossary_translation = _lookup_glossary(text) if is_target_english else None
+                if glossary_translation is not None:
+                    # 命中术语库：直接应用翻译
+                    _apply_translation_to_paragraph(paragraph, glossary_translation)
+                    processed += 1
+                else:
+                    # 与之前的段落文本相同：复用首次出现时的翻译结果，不重复请求
+                    source_idx = first_task_by_text.get(text)
+                    if source_idx is not None:
+                        duplicate_tasks.append((task, source_idx))
+                        continue
+                    first_task_by_text[text] = task_idx
+                    
+                    # 未命中术语库或目标语言不是英语：加入API翻译任务列表
+                    # 加入后会超出字节上限时，先提交当前批次（按请求体中 JSON 转义后的大小计算）
+                    text_bytes = _json_encoded_size(text)
+                    if current_batch and current_batch_bytes + text_bytes > batch_max_bytes:
+                        _submit_batch(current_batch)
+                        current_batch = []
+                        current_batch_bytes = 0
+                    api_tasks.append(task)
+                    current_batch.append(task)
+                    current_batch_bytes += text_bytes
+                    if len(current_batch) == batch_size:
+                        _submit_batch(current_batch)
+                        current_batch = []
+                        current_batch_bytes = 0
+            if current_batch:
+                _submit_batch(current_batch)
             
             if progress_callback:
-                progress_callback(processed, total_count, f"正在并发翻译 {len(api_tasks)} 个段落（分为 {len(task_batches)} 批，使用 {min(5, len(task_batches))} 个线程）...")
+                progress_callback(processed, total_count, f"开始翻译，共 {total_count} 个段落...")
             
-            # 用于线程安全的进度更新
-            progress_lock = Lock()
-            completed_batches = [0]  # 使用列表以便在闭包中修改
+            # ========== 第三步：收集线程池中各批次的API翻译结果 ==========
+            if task_batches and progress_callback:
+                progress_callback(processed, total_count, f"正在并发翻译 {len(api_tasks)} 个段落（分为 {len(task_batches)} 批，使用 {min(max_workers, len(task_batches))} 个线程）...")
             
-            # 存储翻译结果：{任务索引: (翻译文本, 异常)}
-            translation_results = {}
-            
-            # 使用ThreadPoolExecutor并发执行批处理任务
-            max_workers = 5  # 最大并发数
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # 提交所有批处理任务
-                future_to_batch = {
-                    executor.submit(_translate_batch_task, batch_data): batch_data 
-                    for batch_data in task_batches
-                }
+            # 使用as_completed来获取完成的任务（不保证顺序）
+            for future in as_completed(future_to_batch):
+                batch_data = future_to_batch[future]
+                task_list = batch_data[0]
                 
-                # 使用as_completed来获取完成的任务（不保证顺序）
-                for future in as_completed(future_to_batch):
-                    batch_data = future_to_batch[future]
-                    task_list = batch_data[0]
+                try:
+                    result_task_list, translated_texts, error = future.result()
                     
-                    try:
-                        result_task_list, translated_texts, error = future.result()
-                        
-                        if error is None:
-                            # 批处理翻译成功
-                            for idx, (task_idx, _, paragraph, _) in enumerate(result_task_list):
-                                if idx < len(translated_texts):
-                                    translation_results[task_idx] = (translated_texts[idx], None)
-                                else:
-                                    # 结果数量不匹配，标记为失败
-                                    translation_results[task_idx] = (None, Exception("批处理结果数量不匹配"))
-                        else:
-                            # 批处理翻译失败，标记该批次所有任务为失败
-                            for task_idx, _, _, _ in task_list:
-                                translation_results[task_idx] = (None, error)
-                            
-                            # 检查是否是速率限制错误，如果是则等待后重试
-                            error_msg = str(error)
-                            if "429" in error_msg or "rate limit" in error_msg.lower() or "TooManyRequests" in error_msg:
-                                # 等待一段时间后重试（在主线程中重试，避免阻塞线程池）
-                                time.sleep(5)
-                                try:
-                                    retry_task_list, retry_texts, retry_error = _translate_batch_task(batch_data)
-                                    if retry_error is None:
-                                        # 重试成功，覆盖失败结果
-                                        for idx, (task_idx, _, _, _) in enumerate(retry_task_list):
-                                            if idx < len(retry_texts):
-                                                translation_results[task_idx] = (retry_texts[idx], None)
-                                    else:
-                                        # 重试也失败，保留失败结果
-                                        pass
-                                except Exception as retry_ex:
-                                    # 重试时发生异常，保留原始错误
-                                    pass
-                        
-                        # 更新进度（线程安全）
-                        with progress_lock:
-                            completed_batches[0] += 1
-                            if progress_callback:
-                                current_processed = processed + sum(1 for tid in translation_results if translation_results[tid][1] is None)
-                                progress_callback(
-                                    current_processed, 
-                                    total_count, 
-                                    f"翻译进度：{current_processed}/{total_count} ({completed_batches[0]}/{len(task_batches)} 批已完成)"
-                                )
+                    if error is None:
+                        # 批处理翻译成功
+                        for idx, (task_idx, _, _) in enumerate(result_task_list):
+                            if idx < len(translated_texts):
+                                translation_results[task_idx] = (translated_texts[idx], None)
+                                translated_count[0] += 1
+                            else:
+                                # 结果数量不匹配，标记为失败
+                                translation_results[task_idx] = (None, Exception("批处理结果数量不匹配"))
+                    else:
+                        # 批处理翻译失败，标记该批次所有任务为失败
+                        for task_idx, _, _ in task_list:
+                            translation_results[task_idx] = (None, error)
                     
-                    except Exception as e:
-                        # 处理future异常，标记该批次所有任务为失败
-                        for task_idx, _, _, _ in task_list:
-                            translation_results[task_idx] = (None, e)
-                        with progress_lock:
-                            completed_batches[0] += 1
-                            if progress_callback:
-                                current_processed = processed + sum(1 for tid in translation_results if translation_results[tid][1] is None)
-                                progress_callback(
-                                    current_processed, 
-                                    total_count, 
-                                    f"翻译进度：{current_processed}/{total_count} (批次失败)"
-                                )
-            
+                    # 更新进度（线程安全）
+                    with progress_lock:
+                        completed_batches[0] += 1
+                        _report_batch_progress(f"({completed_batches[0]}/{len(task_batches)} 批已完成)")
+                
+                except Exception as e:
+                    # 处理future异常，标记该批次所有任务为失败
+                    for task_idx, _, _ in task_list:
+                        translation_results[task_idx] = (None, e)
+                    with progress_lock:
+                        completed_batches[0] += 1
+                        _report_batch_progress("(批次失败)")
+        
+        if api_tasks:
             # ========== 第四步：按顺序应用翻译结果 ==========
             if progress_callback:
                 progress_callback(processed, total_count, "正在应用翻译结果...")
             
             # 按任务索引顺序应用结果
-            for task_idx, text, paragraph, _ in api_tasks:
+            for task_idx, text, paragraph in api_tasks:
                 if task_idx in translation_results:
                     translated_text, error = translation_results[task_idx]
                     if error is None and translated_text:
@@ -821,16 +1385,27 @@ def translate_word_document(docx_path: str, target_language: str, progress_callb
                 else:
                     # 结果缺失，保留原文
                     failed += 1
+            
+            # 重复文本：使用首次出现时的翻译结果
+            for (task_idx, text, paragraph), source_idx in duplicate_tasks:
+                translated_text, error = translation_results.get(source_idx, (None, None))
+                if error is None and translated_text:
+                    _apply_translation_to_paragraph(paragraph, translated_text)
+                    processed += 1
+                else:
+                    failed += 1
         
         # 生成输出文件路径
         if progress_callback:
             progress_callback(total_count, total_count, "正在保存翻译后的文档...")
         
-        original_path = Path(docx_path)
-        output_path = original_path.parent / f"translated_{original_path.stem}.docx"
+        if output_path is None:
+            original_path = Path(docx_path)
+            output_path = original_path.parent / f"translated_{original_path.stem}.docx"
         
-        # 保存翻译后的文档
-        doc.save(str(output_path))
+        # 保存翻译后的文档（文件对象直接写入，路径统一转为字符串）
+        is_file_object = hasattr(output_path, "write")
+        doc.save(output_path if is_file_object else str(output_path))
         
         if progress_callback:
             if failed > 0:
@@ -838,7 +1413,7 @@ def translate_word_document(docx_path: str, target_language: str, progress_callb
             else:
                 progress_callback(total_count, total_count, f"翻译完成！共翻译 {processed} 个段落")
         
-        return str(output_path)
+        return output_path if is_file_object else str(output_path)
         
     except FileNotFoundError:
         raise Exception(f"找不到文件：{docx_path}")
@@ -846,6 +1421,229 @@ def translate_word_document(docx_path: str, target_language: str, progress_callb
         raise Exception(f"翻译Word文档时发生错误：{str(e)}")
 
 
+# 自定义样式（DeepL风格）的原始 CSS，保留注释和缩进便于维护
+_RAW_CUSTOM_CSS = """
+<style>
+/* ================================================================================== */
+/* 第一阶段：关键样式 - 立即隐藏并设置基础 */
+/* ================================================================================== */
+
+/* 立即隐藏原生导航栏 - 使用多重选择器确保覆盖 */
+[data-testid="stSidebarNav"],
+[data-testid="stSidebarNav"] *,
+nav[data-testid="stSidebarNav"] {
+    display: none !important;
+    visibility: hidden !important;
+    height: 0 !important;
+    width: 0 !important;
+    overflow: hidden !important;
+    position: absolute !important;
+    pointer-events: none !important;
+}
+
+/* 立即设置背景色，防止白屏闪烁 */
+.stApp {
+    background-color: #FFFFFF !important;
+}
+
+section[data-testid="stSidebar"] {
+    background-color: #0F2B46 !important;
+}
+
+/* ================================================================================== */
+/* 全局字体与基础设置 - 使用系统字体避免加载延迟 */
+/* ================================================================================== */
+html, body, [class*="css"] {
+    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "Roboto", "Oxygen", "Ubuntu", "Cantarell", "Fira Sans", "Droid Sans", "Helvetica Neue", sans-serif !important;
+    -webkit-font-smoothing: antialiased;
+    -moz-osx-font-smoothing: grayscale;
+    color: #333333;
+}
+
+/* ================================================================================== */
+/* 侧边栏样式 (DeepL 深蓝色风格) */
+/* ================================================================================== */
+section[data-testid="stSidebar"] {
+    background-color: #0F2B46 !important;
+    border-right: none !important;
+}
+
+/* 强制侧边栏内所有文本为白色 */
+section[data-testid="stSidebar"] .stMarkdown,
+section[data-testid="stSidebar"] :is(h1, h2, h3, p, label, span, div) {
+    color: #FFFFFF !important;
+}
+
+/* 侧边栏链接/按钮 */
+section[data-testid="stSidebar"] a {
+    color: #60A5FA !important;
+}
+
+/* 侧边栏分割线 */
+section[data-testid="stSidebar"] hr {
+    border-color: #1E3A5F !important;
+}
+
+/* 侧边栏的信息提示框 */
+section[data-testid="stSidebar"] .stAlert {
+    background-color: rgba(255, 255, 255, 0.1) !important;
+    border: 1px solid rgba(255, 255, 255, 0.2) !important;
+}
+section[data-testid="stSidebar"] .stAlert * {
+    color: #FFFFFF !important;
+}
+
+/* ================================================================================== */
+/* 标题颜色 */
+/* ================================================================================== */
+h1, h2, h3 {
+    color: #0F2B46 !important;
+    font-weight: 700 !important;
+}
+
+/* ================================================================================== */
+/* 输入框与文本域 (Card Style) */
+/* ================================================================================== */
+.stTextInput > div > div > input,
+.stTextArea > div > div > textarea {
+    background-color: #F8F9FA !important;
+    border: 1px solid #E5E7EB !important;
+    border-radius: 8px !important;
+    color: #1F2937 !important;
+    box-shadow: inset 0 1px 2px rgba(0, 0, 0, 0.05) !important;
+}
+
+/* 聚焦状态 */
+.stTextInput > div > div > input:focus,
+.stTextArea > div > div > textarea:focus {
+    border-color: #3B82F6 !important;
+    box-shadow: 0 0 0 3px rgba(59, 130, 246, 0.2) !important;
+    background-color: #FFFFFF !important;
+}
+
+/* Selectbox */
+div[data-baseweb="select"] > div {
+    background-color: #F8F9FA !important;
+    border-radius: 8px !important;
+    border: 1px solid #E5E7EB !important;
+}
+
+/* 代码块（用于展示可一键复制的邮件/译文）：自动换行，不出现横向滚动条 */
+[data-testid="stCode"] pre,
+[data-testid="stCode"] code,
+.stCodeBlock pre,
+.stCodeBlock code {
+    white-space: pre-wrap !important;
+    word-break: break-word !important;
+}
+
+/* ================================================================================== */
+/* 按钮样式 */
+/* ================================================================================== */
+
+/* Primary Button */
+.stButton button:is([kind="primary"], [type="primary"]),
+:is(div, button)[data-testid="stBaseButton-primary"],
+.stDownloadButton button,
+div[data-testid="stBaseButton-primary"] button {
+    background-color: #3B82F6 !important;
+    color: #FFFFFF !important;
+    border: none !important;
+    border-radius: 6px !important;
+    font-weight: 600 !important;
+    box-shadow: 0 4px 6px -1px rgba(59, 130, 246, 0.3) !important;
+    transition: all 0.2s ease !important;
+}
+
+.stButton button:is([kind="primary"], [type="primary"]):hover,
+:is(div, button)[data-testid="stBaseButton-primary"]:hover {
+    background-color: #2563EB !important;
+    box-shadow: 0 6px 8px -1px rgba(59, 130, 246, 0.4) !important;
+    transform: translateY(-1px);
+}
+
+/* Secondary Button */
+.stButton button:is([kind="secondary"], [type="secondary"]),
+:is(div, button)[data-testid="stBaseButton-secondary"] {
+    background-color: #FFFFFF !important;
+    color: #1F2937 !important;
+    border: 1px solid #D1D5DB !important;
+    border-radius: 6px !important;
+}
+
+/* ================================================================================== */
+/* 文件上传组件汉化与美化 */
+/* ================================================================================== */
+[data-testid="stFileUploader"] {
+    padding: 20px !important;
+    border: 2px dashed #CBD5E1 !important;
+    border-radius: 12px !important;
+    background-color: #F8F9FA !important;
+}
+
+/* 覆盖 "Drag and drop..." 文字 */
+[data-testid="stFileUploader"] section > div > div > span {
+    visibility: hidden !important;
+    position: relative !important;
+}
+[data-testid="stFileUploader"] section > div > div > span::after {
+    content: "拖拽文件到此处" !important;
+    visibility: visible !important;
+    position: absolute !important;
+    top: 0 !important;
+    left: 0 !important;
+    color: #0F2B46 !important;
+    font-weight: 600 !important;
+    font-size: 1.1em !important;
+}
+
+/* 覆盖 Limit 文字 */
+[data-testid="stFileUploader"] section > div > div > small {
+    visibility: hidden !important;
+    position: relative !important;
+}
+[data-testid="stFileUploader"] section > div > div > small::after {
+    content: "单个文件限制 200MB • DOCX, PDF" !important;
+    visibility: visible !important;
+    position: absolute !important;
+    top: 0 !important;
+    left: 0 !important;
+    color: #64748B !important;
+}
+
+/* 浏览按钮文字覆盖 */
+[data-testid="stFileUploader"] button[data-testid="stBaseButton-secondary"] {
+    font-size: 0 !important;
+    min-width: 100px !important;
+}
+[data-testid="stFileUploader"] button[data-testid="stBaseButton-secondary"]::after {
+    content: "浏览文件" !important;
+    font-size: 14px !important;
+    visibility: visible !important;
+    color: #1F2937 !important;
+}
+</style>
+"""
+
+
+def _minify_css(css: str) -> str:
+    """
+    简单压缩 CSS：去除注释并合并连续空白，减少每次重新运行时发送给浏览器的字节数
+    
+    参数:
+        css (str): 原始 CSS 文本（可包含 <style> 标签）
+    
+    返回:
+        str: 压缩后的单行 CSS 文本
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    return re.sub(r'\s+', ' ', css).strip()
+
+
+# 模块加载时压缩一次，之后每次重新运行直接复用
+_CUSTOM_CSS = _minify_css(_RAW_CUSTOM_CSS)
+
+
 def apply_custom_styles():
     """
     应用自定义样式（DeepL风格）
@@ -1062,211 +1860,7 @@ def apply_custom_styles():
     components.html(connection_monitor_html, height=0)
     
     # 第一阶段：关键样式 + 初始隐藏（防止闪烁）
-    st.markdown("""
-        <style>
-        /* ================================================================================== */
-        /* 第一阶段：关键样式 - 立即隐藏并设置基础 */
-        /* ================================================================================== */
-        
-        /* 立即隐藏原生导航栏 - 使用多重选择器确保覆盖 */
-        [data-testid="stSidebarNav"],
-        [data-testid="stSidebarNav"] *,
-        nav[data-testid="stSidebarNav"] {
-            display: none !important;
-            visibility: hidden !important;
-            height: 0 !important;
-            width: 0 !important;
-            overflow: hidden !important;
-            position: absolute !important;
-            pointer-events: none !important;
-        }
-        
-        /* 立即设置背景色，防止白屏闪烁 */
-        .stApp {
-            background-color: #FFFFFF !important;
-        }
-        
-        section[data-testid="stSidebar"] {
-            background-color: #0F2B46 !important;
-        }
-        
-        /* ================================================================================== */
-        /* 全局字体与基础设置 - 使用系统字体避免加载延迟 */
-        /* ================================================================================== */
-        html, body, [class*="css"] {
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "Roboto", "Oxygen", "Ubuntu", "Cantarell", "Fira Sans", "Droid Sans", "Helvetica Neue", sans-serif !important;
-            -webkit-font-smoothing: antialiased;
-            -moz-osx-font-smoothing: grayscale;
-            color: #333333;
-        }
-        
-        /* ================================================================================== */
-        /* 侧边栏样式 (DeepL 深蓝色风格) */
-        /* ================================================================================== */
-        section[data-testid="stSidebar"] {
-            background-color: #0F2B46 !important;
-            border-right: none !important;
-        }
-        
-        /* 强制侧边栏内所有文本为白色 */
-        section[data-testid="stSidebar"] .stMarkdown,
-        section[data-testid="stSidebar"] h1, 
-        section[data-testid="stSidebar"] h2, 
-        section[data-testid="stSidebar"] h3, 
-        section[data-testid="stSidebar"] p, 
-        section[data-testid="stSidebar"] label,
-        section[data-testid="stSidebar"] span,
-        section[data-testid="stSidebar"] div {
-            color: #FFFFFF !important;
-        }
-        
-        /* 侧边栏链接/按钮 */
-        section[data-testid="stSidebar"] a {
-            color: #60A5FA !important;
-        }
-        
-        /* 侧边栏分割线 */
-        section[data-testid="stSidebar"] hr {
-            border-color: #1E3A5F !important;
-        }
-        
-        /* 侧边栏的信息提示框 */
-        section[data-testid="stSidebar"] .stAlert {
-            background-color: rgba(255, 255, 255, 0.1) !important;
-            border: 1px solid rgba(255, 255, 255, 0.2) !important;
-        }
-        section[data-testid="stSidebar"] .stAlert * {
-            color: #FFFFFF !important;
-        }
-        
-        /* ================================================================================== */
-        /* 标题颜色 */
-        /* ================================================================================== */
-        h1, h2, h3 {
-            color: #0F2B46 !important;
-            font-weight: 700 !important;
-        }
-        
-        /* ================================================================================== */
-        /* 输入框与文本域 (Card Style) */
-        /* ================================================================================== */
-        .stTextInput > div > div > input,
-        .stTextArea > div > div > textarea {
-            background-color: #F8F9FA !important;
-            border: 1px solid #E5E7EB !important;
-            border-radius: 8px !important;
-            color: #1F2937 !important;
-            box-shadow: inset 0 1px 2px rgba(0, 0, 0, 0.05) !important;
-        }
-        
-        /* 聚焦状态 */
-        .stTextInput > div > div > input:focus,
-        .stTextArea > div > div > textarea:focus {
-            border-color: #3B82F6 !important;
-            box-shadow: 0 0 0 3px rgba(59, 130, 246, 0.2) !important;
-            background-color: #FFFFFF !important;
-        }
-        
-        /* Selectbox */
-        div[data-baseweb="select"] > div {
-            background-color: #F8F9FA !important;
-            border-radius: 8px !important;
-            border: 1px solid #E5E7EB !important;
-        }
-
-        /* ================================================================================== */
-        /* 按钮样式 */
-        /* ================================================================================== */
-        
-        /* Primary Button */
-        .stButton button[kind="primary"],
-        .stButton button[type="primary"],
-        div[data-testid="stBaseButton-primary"],
-        button[data-testid="stBaseButton-primary"],
-        .stDownloadButton button,
-        div[data-testid="stBaseButton-primary"] button {
-            background-color: #3B82F6 !important;
-            color: #FFFFFF !important;
-            border: none !important;
-            border-radius: 6px !important;
-            font-weight: 600 !important;
-            box-shadow: 0 4px 6px -1px rgba(59, 130, 246, 0.3) !important;
-            transition: all 0.2s ease !important;
-        }
-        
-        .stButton button[kind="primary"]:hover,
-        .stButton button[type="primary"]:hover,
-        div[data-testid="stBaseButton-primary"]:hover,
-        button[data-testid="stBaseButton-primary"]:hover {
-            background-color: #2563EB !important;
-            box-shadow: 0 6px 8px -1px rgba(59, 130, 246, 0.4) !important;
-            transform: translateY(-1px);
-        }
-        
-        /* Secondary Button */
-        .stButton button[kind="secondary"],
-        .stButton button[type="secondary"],
-        div[data-testid="stBaseButton-secondary"],
-        button[data-testid="stBaseButton-secondary"] {
-            background-color: #FFFFFF !important;
-            color: #1F2937 !important;
-            border: 1px solid #D1D5DB !important;
-            border-radius: 6px !important;
-        }
-
-        /* ================================================================================== */
-        /* 文件上传组件汉化与美化 */
-        /* ================================================================================== */
-        [data-testid="stFileUploader"] {
-            padding: 20px !important;
-            border: 2px dashed #CBD5E1 !important;
-            border-radius: 12px !important;
-            background-color: #F8F9FA !important;
-        }
-        
-        /* 覆盖 "Drag and drop..." 文字 */
-        [data-testid="stFileUploader"] section > div > div > span {
-            visibility: hidden !important;
-            position: relative !important;
-        }
-        [data-testid="stFileUploader"] section > div > div > span::after {
-            content: "拖拽文件到此处" !important;
-            visibility: visible !important;
-            position: absolute !important;
-            top: 0 !important;
-            left: 0 !important;
-            color: #0F2B46 !important;
-            font-weight: 600 !important;
-            font-size: 1.1em !important;
-        }
-        
-        /* 覆盖 Limit 文字 */
-        [data-testid="stFileUploader"] section > div > div > small {
-            visibility: hidden !important;
-            position: relative !important;
-        }
-        [data-testid="stFileUploader"] section > div > div > small::after {
-            content: "单个文件限制 200MB • DOCX, PDF" !important;
-            visibility: visible !important;
-            position: absolute !important;
-            top: 0 !important;
-            left: 0 !important;
-            color: #64748B !important;
-        }
-        
-        /* 浏览按钮文字覆盖 */
-        [data-testid="stFileUploader"] button[data-testid="stBaseButton-secondary"] {
-            font-size: 0 !important;
-            min-width: 100px !important;
-        }
-        [data-testid="stFileUploader"] button[data-testid="stBaseButton-secondary"]::after {
-            content: "浏览文件" !important;
-            font-size: 14px !important;
-            visibility: visible !important;
-            color: #1F2937 !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
 
 
 def init_page(page_title: str, page_icon: str, layout: str = "wide"):
@@ -1287,6 +1881,37 @@ def init_page(page_title: str, page_icon: str, layout: str = "wide"):
     apply_custom_styles()
 
 
+def fragment(func):
+    """
+    将函数声明为 Streamlit 片段：片段内的交互只重新运行该函数，而不是整个页面脚本
+    
+    兼容旧版本 Streamlit：依次尝试 st.fragment、st.experimental_fragment，
+    都不存在时原样返回函数（退化为整页重新运行）
+    
+    参数:
+        func: 要包装的页面渲染函数
+    
+    返回:
+        包装后的函数
+    """
+    decorator = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    return decorator(func) if decorator else func
+
+
+# PPT 内容解析使用的正则表达式（模块加载时编译一次）
+# 页标题模式：匹配行首的 Slide N、第N页、数字编号等格式（多行模式）
+_SLIDE_HEADER_RE = re.compile(
+    r'^(?:Slide\s*(\d+)|第([一二三四五六七八九十\d]+)页|(\d+)\s*[\.、])[\s:：\-]*',
+    re.MULTILINE
+)
+# 内容行开头的列表标记（- • · * 或 1. ~ 5.）及其后的空白
+_LIST_PREFIX_RE = re.compile(r'^(?:[-•·*]|[1-5]\.)\s*')
+# 能构成一页（页标题标记 + 至少一个标题字符）的最短文本长度
+_MIN_SLIDE_HEADER_LEN = 3
+# 空行（备选方案中按空行分割幻灯片）
+_BLANK_LINE_RE = re.compile(r'\n\s*\n')
+
+
 def parse_ppt_content(content: str) -> List[Dict[str, Any]]:
     """
     解析 PPT 内容文本，提取每页的标题和内容
@@ -1307,15 +1932,15 @@ def parse_ppt_content(content: str) -> List[Dict[str, Any]]:
     if not content or not content.strip():
         return slides
     
-    # 定义分隔模式：匹配 Slide N、第N页、数字编号等格式
-    # 使用多行模式匹配
-    pattern = r'(?:^|\n)(?:Slide\s*(\d+)|第([一二三四五六七八九十\d]+)页|(\d+)\s*[\.、])[\s:：\-]*(.+?)(?=(?:\nSlide\s*\d+|\n第[一二三四五六七八九十\d]+页|\n\d+\s*[\.、]|\Z))'
-    
-    matches = re.finditer(pattern, content, re.MULTILINE | re.DOTALL)
+    # 先定位所有页标题行，再按相邻标题的位置切分出每页的正文：
+    # 只做一次线性扫描，避免“惰性匹配 + 前瞻”在长文本上反复回溯
+    # 最短的带标题页（如 "1.x"）也有 3 个字符，更短的文本直接使用下面的备选方案
+    headers = list(_SLIDE_HEADER_RE.finditer(content)) if len(content) >= _MIN_SLIDE_HEADER_LEN else []
     
-    for match in matches:
-        # 提取标题部分（匹配组4）
-        title_section = match.group(4).strip() if match.group(4) else ""
+    for i, header in enumerate(headers):
+        # 本页正文：从标题标记之后到下一页标题之前
+        body_end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+        title_section = content[header.end():body_end].strip()
         
         # 分离标题和内容
         lines = title_section.split('\n')
@@ -1326,11 +1951,8 @@ def parse_ppt_content(content: str) -> List[Dict[str, Any]]:
         for line in lines[1:]:
             line = line.strip()
             if line:
-                # 移除列表标记（如果已有）
-                if line.startswith(('-', '•', '·', '*', '1.', '2.', '3.', '4.', '5.')):
-                    # 移除标记后的空格
-                    line = re.sub(r'^[-•·*\d\.]\s*', '', line)
-                content_lines.append(line)
+                # 移除列表标记及其后的空格（没有标记时不做改动）
+                content_lines.append(_LIST_PREFIX_RE.sub('', line))
         
         if title:  # 只有当标题存在时才添加幻灯片
             slides.append({
@@ -1340,16 +1962,13 @@ def parse_ppt_content(content: str) -> List[Dict[str, Any]]:
     
     # 如果没有匹配到任何格式，尝试按空行分割作为备选方案
     if not slides:
-        sections = re.split(r'\n\s*\n', content.strip())
+        sections = _BLANK_LINE_RE.split(content.strip())
         for section in sections:
-            lines = [line.strip() for line in section.split('\n') if line.strip()]
+            # 每行只 strip 一次，再过滤掉空行
+            lines = [line for line in map(str.strip, section.split('\n')) if line]
             if lines:
                 title = lines[0]
-                content_lines = []
-                for line in lines[1:]:
-                    if line.startswith(('-', '•', '·', '*', '1.', '2.', '3.', '4.', '5.')):
-                        line = re.sub(r'^[-•·*\d\.]\s*', '', line)
-                    content_lines.append(line)
+                content_lines = [_LIST_PREFIX_RE.sub('', line) for line in lines[1:]]
                 slides.append({
                     "title": title,
                     "content": content_lines
@@ -1358,65 +1977,114 @@ def parse_ppt_content(content: str) -> List[Dict[str, Any]]:
     return slides
 
 
-def generate_pptx(slides: List[Dict[str, Any]], output_path: str = None) -> str:
+# 已自带项目符号的要点开头字符（生成 PPT 时不再重复添加 "• "）
+_BULLET_CHARS = frozenset("•-·")
+
+
+@st.cache_resource(show_spinner=False)
+def _get_pptx_template_bytes() -> bytes:
+    """
+    生成并缓存已设置为 16:9 尺寸的空白 PPTX 模板（进程内只生成一次）
+    
+    返回:
+        bytes: 模板文件内容
+    """
+    from pptx import Presentation
+    from pptx.util import Inches
+    
+    prs = Presentation()
+    
+    # 设置幻灯片尺寸 (16:9)
+    prs.slide_width = Inches(13.333)
+    prs.slide_height = Inches(7.5)
+    
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+
+def generate_pptx(slides: List[Dict[str, Any]], output_path: Union[str, IO[bytes]] = None) -> Union[str, IO[bytes]]:
     """
     根据幻灯片数据生成 PPTX 文件
     
     参数:
         slides (List[Dict]): 幻灯片数据列表
-        output_path (str, optional): 输出文件路径，如果为 None 则自动生成
+        output_path (str | 文件对象, optional): 输出文件路径，如果为 None 则自动生成；
+            也可以传入可写的文件对象（如 io.BytesIO），直接在内存中生成，不写入磁盘
     
     返回:
-        str: 生成的 PPTX 文件路径
+        str | 文件对象: 生成的 PPTX 文件路径（传入文件对象时原样返回该对象）
     """
     from pptx import Presentation
     from pptx.util import Inches, Pt
     
-    prs = Presentation()
+    # 从缓存的 16:9 空白模板创建演示文稿
+    prs = Presentation(io.BytesIO(_get_pptx_template_bytes()))
     
-    # 设置幻灯片尺寸 (16:9)
-    prs.slide_width = Inches(13.333)
-    prs.slide_height = Inches(7.5)
+    # 版式尺寸与字号对所有幻灯片相同，在循环外只计算一次
+    box_left, box_width = Inches(0.5), Inches(12)
+    title_top, title_height = Inches(0.5), Inches(1)
+    content_top, content_height = Inches(1.8), Inches(5)
+    title_font_size = Pt(32)
+    body_font_size = Pt(18)
+    body_space_after = Pt(12)
+    
+    # 使用空白布局
+    slide_layout = prs.slide_layouts[6]  # 空白布局
     
     for slide_data in slides:
-        # 使用空白布局
-        slide_layout = prs.slide_layouts[6]  # 空白布局
         slide = prs.slides.add_slide(slide_layout)
         
         # 添加标题
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(12), Inches(1))
+        title_box = slide.shapes.add_textbox(box_left, title_top, box_width, title_height)
         title_frame = title_box.text_frame
         title_para = title_frame.paragraphs[0]
         title_para.text = slide_data.get("title", "")
-        title_para.font.size = Pt(32)
+        title_para.font.size = title_font_size
         title_para.font.bold = True
         
         # 添加内容
         content_items = slide_data.get("content", [])
         if content_items:
-            content_box = slide.shapes.add_textbox(Inches(0.5), Inches(1.8), Inches(12), Inches(5))
+            content_box = slide.shapes.add_textbox(box_left, content_top, box_width, content_height)
             content_frame = content_box.text_frame
             content_frame.word_wrap = True
             
-            for i, item in enumerate(content_items):
-                if i == 0:
-                    para = content_frame.paragraphs[0]
-                else:
-                    para = content_frame.add_paragraph()
-                para.text = f"• {item}" if not item.startswith(("•", "-", "·")) else item
-                para.font.size = Pt(18)
-                para.space_after = Pt(12)
+            # 一次性写入所有要点（换行符会拆分为多个段落），不再逐条 add_paragraph 后单独设置文本
+            content_frame.text = "\n".join(
+                item if item[:1] in _BULLET_CHARS else f"• {item}"
+                for item in content_items
+            )
+            for para in content_frame.paragraphs:
+                para.font.size = body_font_size
+                para.space_after = body_space_after
     
     # 保存文件
     if output_path is None:
-        temp_dir = Path("temp")
-        temp_dir.mkdir(exist_ok=True)
-        output_path = str(temp_dir / f"generated_{uuid.uuid4()}.pptx")
+        output_path = str(_get_temp_dir() / f"generated_{uuid.uuid4().hex}.pptx")
     
     prs.save(output_path)
     return output_path
 
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_pptx_from_content(content: str) -> Tuple[List[Dict[str, Any]], Optional[bytes]]:
+    """
+    解析 PPT 内容文本并在内存中生成 PPTX（按内容文本缓存，相同内容再次生成时直接返回）
+    
+    参数:
+        content (str): PPT 内容文本
+    
+    返回:
+        Tuple[List[Dict], Optional[bytes]]: (幻灯片数据列表, PPTX 文件内容)，无法解析时文件内容为 None
+    """
+    slides = parse_ppt_content(content)
+    if not slides:
+        return slides, None
+    
+    return slides, generate_pptx(slides, io.BytesIO()).getvalue()
+
+
 def proofread_email(
     email_content: str,
     proofread_mode: str,